@@ -11,9 +11,14 @@ import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Query, Response
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
 import json
 
+try:
+    import orjson  # Optional: C-accelerated JSON encoding
+except ImportError:
+    orjson = None
+
 from core.cache import get_cache_service, cached
 from core.middleware import metrics_collector
 from core.tasks import get_task_manager, TaskPriority
@@ -24,6 +29,10 @@ logger = logging.getLogger(__name__)
 # Create optimized router
 router = APIRouter(prefix="/api/v2", tags=["optimized"])
 
+# Metrics and task payloads are plain dicts of str/int/float, so they can
+# skip jsonable_encoder and go straight to orjson when it is installed
+FastJSONResponse = ORJSONResponse if orjson else JSONResponse
+
 
 # ============================================
 # HEALTH & METRICS ENDPOINTS
@@ -61,11 +70,11 @@ async def get_metrics():
     """
     cache_service = get_cache_service()
     
-    return {
+    return FastJSONResponse({
         "timestamp": datetime.now().isoformat(),
         "request_metrics": await metrics_collector.get_metrics(),
         "cache_stats": await cache_service.stats()
-    }
+    })
 
 
 @router.post("/metrics/reset")
@@ -128,10 +137,10 @@ async def list_tasks(
     else:
         tasks = await task_manager.get_recent_tasks(limit=limit)
     
-    return {
+    return FastJSONResponse({
         "tasks": tasks,
         "stats": task_manager.get_stats()
-    }
+    })
 
 
 @router.get("/tasks/{task_id}")
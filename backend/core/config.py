@@ -5,7 +5,7 @@ Following 12-factor app principles
 from functools import lru_cache
 from typing import List, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field, field_validator
+from pydantic import AliasChoices, Field, field_validator
 import os
 
 
@@ -32,8 +32,12 @@ class Settings(BaseSettings):
     db_timeout: float = Field(default=30.0, description="Database timeout in seconds")
     
     # AI Services
-    ai_timeout: float = Field(default=8.0, description="AI request timeout")
-    ai_analysis_timeout: float = Field(default=5.0, description="AI analysis timeout")
+    ai_timeout: float = Field(
+        default=8.0,
+        validation_alias=AliasChoices("ai_timeout_seconds", "ai_timeout"),
+        description="AI request timeout"
+    )
+    ai_analysis_timeout: float = Field(default=180.0, description="AI analysis timeout (LLM inference needs time on CPU)")
     use_local_ai: bool = Field(default=True, description="Use local AI (free) as primary")
     openai_api_key: Optional[str] = Field(default=None, description="OpenAI API key for fallback")
     openai_model: str = Field(default="gpt-3.5-turbo", description="OpenAI model to use")
@@ -56,7 +60,8 @@ class Settings(BaseSettings):
     
     # Email Sync
     auto_sync_enabled: bool = Field(default=True, description="Enable auto email sync")
-    sync_interval_minutes: int = Field(default=15, description="Email sync interval")
+    sync_interval_minutes: int = Field(default=2, description="Email sync interval")
+    sync_worker_mode: bool = Field(default=False, description="Run email auto-sync in a separate worker process (python main.py --sync-worker)")
     max_emails_per_sync: int = Field(default=100000, description="Max emails to fetch")
     
     # Twilio SMS
@@ -92,6 +97,11 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_requests: int = Field(default=1000, description="Requests per minute")
     rate_limit_window: int = Field(default=60, description="Rate limit window in seconds")
+    redis_url: Optional[str] = Field(default=None, description="Redis URL - shares rate limit counters across workers")
+    trusted_proxies: str = Field(
+        default="127.0.0.1",
+        description="Reverse proxy IPs whose X-Forwarded-For / X-Real-IP are trusted (comma-separated, * for any)"
+    )
     
     # File Upload
     max_file_size_mb: int = Field(default=10, description="Max upload file size in MB")
@@ -124,6 +134,7 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         case_sensitive = False
         extra = "ignore"
+        frozen = True
 
 
 @lru_cache()
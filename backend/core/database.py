@@ -14,17 +14,45 @@ import time
 import logging
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any, Tuple, TypeVar, Generic, Callable
+from typing import Optional, List, Dict, Any, Tuple, TypeVar, Generic, Callable, Deque
 from datetime import datetime, timedelta
-from functools import wraps
-from collections import OrderedDict
+from functools import lru_cache, partial, wraps
+from collections import OrderedDict, deque
 import hashlib
 import json
+import pickle
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Per-connection settings (not persisted in the database file)
+_CONNECTION_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA cache_size=-64000;     -- 64MB cache
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;   -- 256MB memory-mapped I/O
+"""
+
+
+@lru_cache(maxsize=128)
+def _build_insert_sql(table: str, columns: Tuple[str, ...]) -> str:
+    """Build (and memoize) the batch INSERT statement for a table/column set"""
+    placeholders = ','.join('?' * len(columns))
+    return f"INSERT OR REPLACE INTO {table} ({','.join(columns)}) VALUES ({placeholders})"
+
+
+# Arguments larger than this are hashed in the default executor
+_LARGE_KEY_ARG_BYTES = 64 * 1024
+
+
+def _has_large_arg(args: Tuple, kwargs: Dict[str, Any]) -> bool:
+    """Check whether any str/bytes argument is big enough to block on hashing"""
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, (str, bytes)) and len(value) > _LARGE_KEY_ARG_BYTES:
+            return True
+    return False
+
 
 @dataclass
 class PoolStats:
@@ -53,8 +81,17 @@ class LRUCache(Generic[T]):
     
     def _make_key(self, *args, **kwargs) -> str:
         """Generate cache key from arguments"""
-        key_data = json.dumps((args, sorted(kwargs.items())), default=str)
-        return hashlib.md5(key_data.encode()).hexdigest()
+        # Only multi-kwarg calls need sorting for an order-independent key
+        if len(kwargs) > 1:
+            items = tuple(sorted(kwargs.items()))
+        else:
+            items = tuple(kwargs.items())
+        try:
+            key_data = pickle.dumps((args, items), protocol=5)
+        except Exception:
+            # Unpicklable argument - fall back to string conversion
+            key_data = json.dumps((args, items), default=str).encode()
+        return hashlib.blake2b(key_data, digest_size=16).hexdigest()
     
     async def get(self, key: str) -> Optional[T]:
         """Get item from cache if not expired"""
@@ -143,12 +180,16 @@ class AsyncConnectionPool:
         self.max_idle_time = max_idle_time
         self.health_check_interval = health_check_interval
         
-        self._pool: asyncio.Queue[Connection] = asyncio.Queue(maxsize=max_connections)
+        # Idle connections are kept on a plain LIFO stack; tasks only park
+        # on a future when every connection is checked out
+        self._idle: List[Connection] = []
+        self._waiters: Deque[asyncio.Future] = deque()
         self._all_connections: List[Connection] = []
         self._lock = asyncio.Lock()
         self._initialized = False
         self._closed = False
         self._health_task: Optional[asyncio.Task] = None
+        self._pragmas_applied = False
         
         self.stats = PoolStats()
     
@@ -161,15 +202,18 @@ class AsyncConnectionPool:
             if self._initialized:
                 return
             
-            # Create initial connections
-            for _ in range(self.min_connections):
-                conn = await self._create_connection()
+            # Create initial connections concurrently (each aiosqlite
+            # connection runs on its own thread)
+            conns = await asyncio.gather(
+                *[self._create_connection() for _ in range(self.min_connections)]
+            )
+            for conn in conns:
                 if conn:
-                    await self._pool.put(conn)
+                    self._idle.append(conn)
                     self._all_connections.append(conn)
             
             self.stats.total_connections = len(self._all_connections)
-            self.stats.idle_connections = self._pool.qsize()
+            self.stats.idle_connections = len(self._idle)
             
             # Start health check background task
             self._health_task = asyncio.create_task(self._health_check_loop())
@@ -185,12 +229,14 @@ class AsyncConnectionPool:
                 isolation_level=None  # Autocommit mode for better performance
             )
             
-            # Enable WAL mode and optimizations
-            await conn.execute("PRAGMA journal_mode=WAL")
-            await conn.execute("PRAGMA synchronous=NORMAL")
-            await conn.execute("PRAGMA cache_size=-64000")  # 64MB cache
-            await conn.execute("PRAGMA temp_store=MEMORY")
-            await conn.execute("PRAGMA mmap_size=268435456")  # 256MB memory-mapped I/O
+            # WAL mode is persisted in the database file, so it only needs
+            # to be switched on by the first connection the pool opens
+            if not self._pragmas_applied:
+                await conn.execute("PRAGMA journal_mode=WAL")
+                self._pragmas_applied = True
+            
+            # Connection-scoped optimizations, applied in a single round-trip
+            await conn.executescript(_CONNECTION_PRAGMAS)
             
             conn.row_factory = aiosqlite.Row
             
@@ -244,23 +290,21 @@ class AsyncConnectionPool:
         start_time = time.time()
         
         try:
-            # Try to get from pool, create new if needed
-            try:
-                conn_wrapper = await asyncio.wait_for(
-                    self._pool.get(),
-                    timeout=5.0
-                )
-            except asyncio.TimeoutError:
-                # Pool exhausted, try to create new connection
+            # Take an idle connection, create one if under the cap,
+            # otherwise wait for a connection to be released
+            if self._idle:
+                conn_wrapper = self._idle.pop()
+            else:
                 if len(self._all_connections) < self.max_connections:
                     async with self._lock:
-                        conn_wrapper = await self._create_connection()
-                        if conn_wrapper:
-                            self._all_connections.append(conn_wrapper)
-                            self.stats.total_connections += 1
+                        if len(self._all_connections) < self.max_connections:
+                            conn_wrapper = await self._create_connection()
+                            if conn_wrapper:
+                                self._all_connections.append(conn_wrapper)
+                                self.stats.total_connections += 1
                 
                 if not conn_wrapper:
-                    raise RuntimeError("Connection pool exhausted")
+                    conn_wrapper = await self._wait_for_release()
             
             # Verify connection health
             if not conn_wrapper.is_healthy:
@@ -281,7 +325,7 @@ class AsyncConnectionPool:
             
             conn_wrapper.last_used = datetime.now()
             self.stats.active_connections += 1
-            self.stats.idle_connections = self._pool.qsize()
+            self.stats.idle_connections = len(self._idle)
             
             yield conn_wrapper.conn
             
@@ -297,16 +341,35 @@ class AsyncConnectionPool:
                 conn_wrapper.query_count += 1
                 self.stats.active_connections -= 1
                 
-                # Return to pool
-                try:
-                    self._pool.put_nowait(conn_wrapper)
-                    self.stats.idle_connections = self._pool.qsize()
-                except asyncio.QueueFull:
-                    # Pool full, close this connection
-                    try:
-                        await conn_wrapper.conn.close()
-                    except Exception:
-                        pass
+                self._release(conn_wrapper)
+    
+    async def _wait_for_release(self) -> Connection:
+        """Park until another task releases a connection"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout=5.0)
+        except asyncio.TimeoutError:
+            # A release can land in the same loop step as the timeout; pass it on
+            if waiter.done() and not waiter.cancelled():
+                self._release(waiter.result())
+            raise RuntimeError("Connection pool exhausted")
+        except asyncio.CancelledError:
+            # Hand the connection on if it arrived as we were cancelled
+            if waiter.done() and not waiter.cancelled():
+                self._release(waiter.result())
+            raise
+    
+    def _release(self, conn_wrapper: Connection) -> None:
+        """Hand a connection to the next waiter or return it to the pool"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn_wrapper)
+                return
+        
+        self._idle.append(conn_wrapper)
+        self.stats.idle_connections = len(self._idle)
     
     async def close(self) -> None:
         """Close all connections and shutdown pool"""
@@ -328,12 +391,13 @@ class AsyncConnectionPool:
             
             self._all_connections.clear()
             
-            # Clear the queue
-            while not self._pool.empty():
-                try:
-                    self._pool.get_nowait()
-                except Exception:
-                    break
+            self._idle.clear()
+            
+            # Fail anyone still waiting for a connection
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(RuntimeError("Connection pool closed"))
         
         logger.info("ðŸ”Œ Connection pool closed")
 
@@ -371,8 +435,15 @@ class AsyncDatabaseManager:
         def decorator(func: Callable):
             @wraps(func)
             async def wrapper(*args, **kwargs):
-                # Generate cache key
-                cache_key = f"{func.__name__}:{self.cache._make_key(*args[1:], **kwargs)}"
+                # Generate cache key (off the event loop for large payloads)
+                key_args = args[1:]
+                if _has_large_arg(key_args, kwargs):
+                    key_hash = await asyncio.get_running_loop().run_in_executor(
+                        None, partial(self.cache._make_key, *key_args, **kwargs)
+                    )
+                else:
+                    key_hash = self.cache._make_key(*key_args, **kwargs)
+                cache_key = f"{func.__name__}:{key_hash}"
                 
                 # Try cache first
                 cached = await self.cache.get(cache_key)
@@ -467,8 +538,7 @@ class AsyncDatabaseManager:
         if not values_list:
             return 0
         
-        placeholders = ','.join(['?' for _ in columns])
-        query = f"INSERT OR REPLACE INTO {table} ({','.join(columns)}) VALUES ({placeholders})"
+        query = _build_insert_sql(table, tuple(columns))
         
         total_inserted = 0
         
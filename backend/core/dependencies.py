@@ -2,7 +2,7 @@
 Dependency Injection Container
 Clean separation of concerns with proper dependency management
 """
-from functools import lru_cache
+from functools import cached_property
 from typing import Generator, AsyncGenerator
 from contextlib import asynccontextmanager
 
@@ -26,39 +26,22 @@ class ServiceContainer:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self):
-        if self._initialized:
-            return
-        
-        self._db_service = None
-        self._local_ai_service = None
-        self._openai_service = None
-        self._scraper_service = None
-        self._resume_parser = None
-        self._matching_engine = None
-        self._token_storage = None
-        self._initialized = True
+    # Services are resolved on first access and then stored in the
+    # instance __dict__, so later lookups skip the getter entirely.
     
-    @property
+    @cached_property
     def db(self) -> DatabaseService:
-        if self._db_service is None:
-            self._db_service = get_db_service()
-        return self._db_service
+        return get_db_service()
     
-    @property
+    @cached_property
     def local_ai(self) -> LocalAIService:
-        if self._local_ai_service is None:
-            self._local_ai_service = get_local_ai_service()
-        return self._local_ai_service
+        return get_local_ai_service()
     
-    @property
+    @cached_property
     def openai(self) -> OpenAIService:
-        if self._openai_service is None:
-            self._openai_service = get_openai_service()
-        return self._openai_service
+        return get_openai_service()
     
     @property
     def ai(self) -> LocalAIService:
@@ -70,29 +53,21 @@ class ServiceContainer:
         """Fallback AI service (OpenAI)"""
         return self.openai
     
-    @property
+    @cached_property
     def scraper(self) -> EmailScraperService:
-        if self._scraper_service is None:
-            self._scraper_service = get_scraper_service()
-        return self._scraper_service
+        return get_scraper_service()
     
-    @property
+    @cached_property
     def resume_parser(self) -> ResumeParser:
-        if self._resume_parser is None:
-            self._resume_parser = ResumeParser()
-        return self._resume_parser
+        return ResumeParser()
     
-    @property
+    @cached_property
     def matching_engine(self) -> MatchingEngine:
-        if self._matching_engine is None:
-            self._matching_engine = MatchingEngine()
-        return self._matching_engine
+        return MatchingEngine()
     
-    @property
+    @cached_property
     def token_storage(self) -> TokenStorage:
-        if self._token_storage is None:
-            self._token_storage = get_token_storage()
-        return self._token_storage
+        return get_token_storage()
 
 
 # Singleton instance
@@ -14,9 +14,9 @@ import platform
 import psutil
 import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Awaitable
+from typing import Any, Callable, Dict, List, Optional, Awaitable, Set, Tuple
 import sys
 
 logger = logging.getLogger(__name__)
@@ -37,11 +37,11 @@ class ComponentHealth:
     status: HealthStatus
     message: str = ""
     latency_ms: float = 0.0
-    last_check: datetime = field(default_factory=datetime.now)
+    last_check: float = field(default_factory=time.time)  # epoch seconds
     details: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(frozen=True)
 class SystemResources:
     """System resource information"""
     cpu_percent: float
@@ -73,50 +73,68 @@ class HealthCheck:
         name: str,
         check_func: Callable[[], Awaitable[bool]],
         timeout: float = 5.0,
-        critical: bool = False
+        critical: bool = False,
+        cache_ttl: float = 10.0
     ):
         self.name = name
         self.check_func = check_func
         self.timeout = timeout
         self.critical = critical
+        self.cache_ttl = cache_ttl
         self._last_result: Optional[ComponentHealth] = None
+        self._cached_until = 0.0
+        self._lock = asyncio.Lock()
     
     async def check(self) -> ComponentHealth:
-        """Execute the health check"""
-        start_time = time.time()
+        """
+        Execute the health check, reusing the last result while it is
+        within cache_ttl. Concurrent callers share a single execution.
+        """
+        if self._last_result is not None and time.monotonic() < self._cached_until:
+            return self._last_result
+        
+        async with self._lock:
+            # Another caller may have refreshed the result while we waited
+            if self._last_result is not None and time.monotonic() < self._cached_until:
+                return self._last_result
+            
+            result = await self._run()
+            self._cached_until = time.monotonic() + self.cache_ttl
+            return result
+    
+    async def _run(self) -> ComponentHealth:
+        """Run the check function and record the result"""
+        start_time = time.perf_counter()
         
         try:
             async with asyncio.timeout(self.timeout):
                 is_healthy = await self.check_func()
             
-            latency = (time.time() - start_time) * 1000
+            latency = (time.perf_counter() - start_time) * 1000
             
             self._last_result = ComponentHealth(
                 name=self.name,
                 status=HealthStatus.HEALTHY if is_healthy else HealthStatus.UNHEALTHY,
                 message="OK" if is_healthy else "Check failed",
-                latency_ms=latency,
-                last_check=datetime.now()
+                latency_ms=latency
             )
             
         except asyncio.TimeoutError:
-            latency = (time.time() - start_time) * 1000
+            latency = (time.perf_counter() - start_time) * 1000
             self._last_result = ComponentHealth(
                 name=self.name,
                 status=HealthStatus.UNHEALTHY,
                 message=f"Timeout after {self.timeout}s",
-                latency_ms=latency,
-                last_check=datetime.now()
+                latency_ms=latency
             )
             
         except Exception as e:
-            latency = (time.time() - start_time) * 1000
+            latency = (time.perf_counter() - start_time) * 1000
             self._last_result = ComponentHealth(
                 name=self.name,
                 status=HealthStatus.UNHEALTHY,
                 message=f"Error: {str(e)[:100]}",
-                latency_ms=latency,
-                last_check=datetime.now()
+                latency_ms=latency
             )
         
         return self._last_result
@@ -126,38 +144,143 @@ class HealthCheck:
         return self._last_result
 
 
+# Free disk space changes slowly, so statvfs results are reused briefly
+_DISK_CACHE_TTL = 30.0
+_disk_cache: Tuple[float, Any] = (0.0, None)
+
+
+def _get_disk_usage():
+    """psutil.disk_usage('/') cached for _DISK_CACHE_TTL seconds"""
+    global _disk_cache
+    
+    ts, usage = _disk_cache
+    now = time.monotonic()
+    if usage is None or now - ts >= _DISK_CACHE_TTL:
+        usage = psutil.disk_usage('/')
+        _disk_cache = (now, usage)
+    return usage
+
+
+def _format_uptime(seconds: float) -> str:
+    """Format like str(timedelta) without the fraction, e.g. '1 day, 2:03:04'"""
+    total = int(seconds)
+    days, rem = divmod(total, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    hms = f"{hours}:{minutes:02d}:{secs:02d}"
+    if days:
+        return f"{days} day{'s' if days != 1 else ''}, {hms}"
+    return hms
+
+
+def _failed_result(name: str, exc: BaseException) -> ComponentHealth:
+    """Result for a check whose execution raised"""
+    return ComponentHealth(
+        name=name,
+        status=HealthStatus.UNHEALTHY,
+        message=f"Check failed: {str(exc)[:100]}"
+    )
+
+
+def _component_to_dict(result: ComponentHealth, critical: bool) -> Dict[str, Any]:
+    """Render a component result for the overall status response"""
+    return {
+        'status': result.status.value,
+        'message': result.message,
+        'latency_ms': round(result.latency_ms, 2),
+        'last_check': datetime.fromtimestamp(result.last_check).isoformat(),
+        'critical': critical
+    }
+
+
 class HealthCheckManager:
     """
     Manages all health checks for the application
     """
     
     def __init__(self):
-        self._checks: Dict[str, HealthCheck] = {}
+        # Registry kept as parallel arrays (rebuilt on register/unregister,
+        # never mutated in place) so sweeps iterate plain lists and callers
+        # can hold a consistent snapshot across awaits
+        self._checks: List[HealthCheck] = []
+        self._names: List[str] = []
+        self._critical_flags: List[bool] = []
+        self._index: Dict[str, int] = {}
+        self._critical: List[HealthCheck] = []
+        self._critical_mask = 0  # bit i set when check i is critical
+        self._full_mask = 0      # one bit per registered check
+        self._inflight_checks: Set[asyncio.Task] = set()
         self._background_task: Optional[asyncio.Task] = None
         self._running = False
         self._check_interval = 30  # seconds
-        self._startup_time = datetime.now()
+        self._last_full_check: Optional[float] = None  # monotonic
+        
+        # Last overall status snapshot, reused for _status_ttl seconds
+        self._status_ttl = 1.0
+        self._status_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._status_inflight: Optional[asyncio.Future] = None
+        self._startup_time = time.monotonic()
+        
+        # Resource snapshots are cached briefly so frequent /health polls
+        # don't re-probe psutil on every request
+        self._resources_ttl = 2.0
+        self._resources_cache: Optional[Tuple[float, SystemResources]] = None
+        
+        # Prime the CPU counter so non-blocking cpu_percent() calls
+        # report usage since the previous call
+        psutil.cpu_percent(interval=None)
+        self._process = psutil.Process(os.getpid())
+        
+        # Process-lifetime constants reported by get_overall_status()
+        self._env = {
+            'python_version': sys.version.split()[0],
+            'platform': platform.system(),
+            'hostname': platform.node()
+        }
     
     def register(
         self,
         name: str,
         check_func: Callable[[], Awaitable[bool]],
         timeout: float = 5.0,
-        critical: bool = False
+        critical: bool = False,
+        cache_ttl: float = 10.0
     ) -> None:
         """Register a health check"""
-        self._checks[name] = HealthCheck(
+        check = HealthCheck(
             name=name,
             check_func=check_func,
             timeout=timeout,
-            critical=critical
+            critical=critical,
+            cache_ttl=cache_ttl
         )
+        
+        checks = list(self._checks)
+        idx = self._index.get(name)
+        if idx is None:
+            checks.append(check)
+        else:
+            checks[idx] = check
+        self._set_checks(checks)
         logger.debug(f"Registered health check: {name}")
     
     def unregister(self, name: str) -> None:
         """Unregister a health check"""
-        if name in self._checks:
-            del self._checks[name]
+        idx = self._index.get(name)
+        if idx is not None:
+            self._set_checks(self._checks[:idx] + self._checks[idx + 1:])
+    
+    def _set_checks(self, checks: List[HealthCheck]) -> None:
+        """Install a new registry and rebuild the derived arrays"""
+        self._checks = checks
+        self._names = [check.name for check in checks]
+        self._critical_flags = [check.critical for check in checks]
+        self._index = {name: i for i, name in enumerate(self._names)}
+        self._critical = [check for check in checks if check.critical]
+        self._critical_mask = sum(
+            1 << i for i, critical in enumerate(self._critical_flags) if critical
+        )
+        self._full_mask = (1 << len(checks)) - 1
     
     async def start(self, check_interval: int = 30) -> None:
         """Start background health checking"""
@@ -186,7 +309,10 @@ class HealthCheckManager:
         """Background loop to periodically run health checks"""
         while self._running:
             try:
-                await self.check_all()
+                # Skip the sweep if an endpoint already ran one recently
+                last = self._last_full_check
+                if last is None or time.monotonic() - last >= self._check_interval / 2:
+                    await self.check_all()
                 await asyncio.sleep(self._check_interval)
             except asyncio.CancelledError:
                 break
@@ -194,53 +320,68 @@ class HealthCheckManager:
                 logger.error(f"Health check loop error: {e}")
                 await asyncio.sleep(5)
     
-    async def check_all(self) -> Dict[str, ComponentHealth]:
-        """Run all health checks"""
-        results = {}
-        
-        # Run checks concurrently
-        tasks = {
-            name: check.check()
-            for name, check in self._checks.items()
-        }
-        
-        completed = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    async def _run_checks(self, checks: List[HealthCheck]) -> List[ComponentHealth]:
+        """Run checks concurrently; results are in the same order as checks"""
+        completed = await asyncio.gather(
+            *[check.check() for check in checks],
+            return_exceptions=True
+        )
         
-        for name, result in zip(tasks.keys(), completed):
+        results = []
+        for check, result in zip(checks, completed):
             if isinstance(result, Exception):
-                results[name] = ComponentHealth(
-                    name=name,
-                    status=HealthStatus.UNHEALTHY,
-                    message=f"Check failed: {str(result)[:100]}"
-                )
-            else:
-                results[name] = result
-        
+                result = _failed_result(check.name, result)
+            results.append(result)
         return results
     
+    async def check_all(self) -> Dict[str, ComponentHealth]:
+        """Run all health checks"""
+        names = self._names
+        results = await self._run_checks(self._checks)
+        self._last_full_check = time.monotonic()
+        return dict(zip(names, results))
+    
     async def check_one(self, name: str) -> Optional[ComponentHealth]:
         """Run a specific health check"""
-        if name not in self._checks:
+        idx = self._index.get(name)
+        if idx is None:
             return None
-        return await self._checks[name].check()
+        return await self._checks[idx].check()
     
     def get_last_results(self) -> Dict[str, ComponentHealth]:
         """Get last cached results"""
         return {
             name: check.last_result
-            for name, check in self._checks.items()
+            for name, check in zip(self._names, self._checks)
             if check.last_result
         }
     
+    def _cached_resources(self) -> Optional[SystemResources]:
+        """Return the cached resource snapshot if it is still fresh"""
+        cached = self._resources_cache
+        if cached and time.monotonic() - cached[0] < self._resources_ttl:
+            return cached[1]
+        return None
+    
     def get_system_resources(self) -> SystemResources:
-        """Get current system resource usage"""
+        """Get current system resource usage (cached for a short TTL)"""
+        cached = self._cached_resources()
+        if cached is not None:
+            return cached
+        
+        now = time.monotonic()
         try:
-            cpu = psutil.cpu_percent(interval=0.1)
+            cpu = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            process = psutil.Process()
+            disk = _get_disk_usage()
             
-            return SystemResources(
+            # oneshot() caches the /proc reads shared by these probes
+            process = self._process
+            with process.oneshot():
+                threads = process.num_threads()
+                open_files = len(process.open_files()) if hasattr(process, 'open_files') else 0
+            
+            resources = SystemResources(
                 cpu_percent=cpu,
                 memory_percent=memory.percent,
                 memory_used_mb=memory.used / (1024 * 1024),
@@ -248,9 +389,11 @@ class HealthCheckManager:
                 disk_percent=disk.percent,
                 disk_used_gb=disk.used / (1024 ** 3),
                 disk_available_gb=disk.free / (1024 ** 3),
-                open_files=len(process.open_files()) if hasattr(process, 'open_files') else 0,
-                threads=process.num_threads()
+                open_files=open_files,
+                threads=threads
             )
+            self._resources_cache = (now, resources)
+            return resources
         except Exception as e:
             logger.error(f"Error getting system resources: {e}")
             return SystemResources(
@@ -261,20 +404,53 @@ class HealthCheckManager:
     
     async def get_overall_status(self) -> Dict[str, Any]:
         """Get overall system health status"""
-        results = await self.check_all()
-        resources = self.get_system_resources()
+        cached = self._status_cache
+        if cached and time.monotonic() - cached[0] < self._status_ttl:
+            return self._with_volatile_fields(cached[1])
         
-        # Determine overall status
-        critical_healthy = all(
-            result.status == HealthStatus.HEALTHY
-            for name, result in results.items()
-            if self._checks[name].critical
-        )
+        # Concurrent callers share one in-flight evaluation; shield it so a
+        # cancelled caller doesn't cancel the others' result
+        inflight = self._status_inflight
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._compute_status())
+            self._status_inflight = inflight
+            inflight.add_done_callback(self._clear_status_inflight)
         
-        all_healthy = all(
-            result.status == HealthStatus.HEALTHY
-            for result in results.values()
-        )
+        snapshot = await asyncio.shield(inflight)
+        return self._with_volatile_fields(snapshot)
+    
+    def _clear_status_inflight(self, future: asyncio.Future) -> None:
+        if self._status_inflight is future:
+            self._status_inflight = None
+    
+    async def _compute_status(self) -> Dict[str, Any]:
+        """Run all checks and build the status snapshot"""
+        # Snapshot the registry so names/flags stay aligned with results
+        checks = self._checks
+        names = self._names
+        critical_flags = self._critical_flags
+        critical_mask = self._critical_mask
+        full_mask = self._full_mask
+        
+        # Probe resources on a worker thread while the checks run
+        resources = self._cached_resources()
+        if resources is None:
+            results, resources = await asyncio.gather(
+                self._run_checks(checks),
+                asyncio.to_thread(self.get_system_resources)
+            )
+        else:
+            results = await self._run_checks(checks)
+        self._last_full_check = time.monotonic()
+        
+        # Determine overall status from a single pass over the results
+        healthy_mask = 0
+        for i, result in enumerate(results):
+            if result.status == HealthStatus.HEALTHY:
+                healthy_mask |= 1 << i
+        
+        critical_healthy = (healthy_mask & critical_mask) == critical_mask
+        all_healthy = healthy_mask == full_mask
         
         if critical_healthy and all_healthy:
             overall_status = HealthStatus.HEALTHY
@@ -283,22 +459,14 @@ class HealthCheckManager:
         else:
             overall_status = HealthStatus.UNHEALTHY
         
-        uptime = datetime.now() - self._startup_time
-        
-        return {
+        snapshot = {
             'status': overall_status.value,
-            'timestamp': datetime.now().isoformat(),
-            'uptime_seconds': uptime.total_seconds(),
-            'uptime_human': str(uptime).split('.')[0],
+            'timestamp': None,
+            'uptime_seconds': None,
+            'uptime_human': None,
             'components': {
-                name: {
-                    'status': result.status.value,
-                    'message': result.message,
-                    'latency_ms': round(result.latency_ms, 2),
-                    'last_check': result.last_check.isoformat(),
-                    'critical': self._checks[name].critical
-                }
-                for name, result in results.items()
+                name: _component_to_dict(result, critical)
+                for name, result, critical in zip(names, results, critical_flags)
             },
             'system': {
                 'cpu_percent': round(resources.cpu_percent, 1),
@@ -310,11 +478,19 @@ class HealthCheckManager:
                 'threads': resources.threads,
                 'is_healthy': resources.is_healthy
             },
-            'environment': {
-                'python_version': sys.version.split()[0],
-                'platform': platform.system(),
-                'hostname': platform.node()
-            }
+            'environment': self._env
+        }
+        self._status_cache = (time.monotonic(), snapshot)
+        return snapshot
+    
+    def _with_volatile_fields(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a status snapshot, filling in the per-call time fields"""
+        uptime = time.monotonic() - self._startup_time
+        return {
+            **snapshot,
+            'timestamp': datetime.now().isoformat(),
+            'uptime_seconds': uptime,
+            'uptime_human': _format_uptime(uptime),
         }
     
     async def liveness(self) -> Dict[str, Any]:
@@ -325,24 +501,40 @@ class HealthCheckManager:
         return {
             'status': 'alive',
             'timestamp': datetime.now().isoformat(),
-            'uptime_seconds': (datetime.now() - self._startup_time).total_seconds()
+            'uptime_seconds': time.monotonic() - self._startup_time
         }
     
     async def readiness(self) -> Dict[str, Any]:
         """
         Kubernetes readiness probe
-        Returns ready if the application can handle requests
+        Returns ready if the application can handle requests.
+        Answers not_ready as soon as any critical check fails; checks
+        still in flight finish in the background and refresh their cache.
         """
-        # Check critical components only
-        results = {}
-        for name, check in self._checks.items():
-            if check.critical:
-                results[name] = await check.check()
+        # Check critical components only, concurrently
+        pending = {
+            asyncio.ensure_future(check.check()): check
+            for check in self._critical
+        }
+        results: Dict[str, ComponentHealth] = {}
+        all_ready = True
         
-        all_ready = all(
-            result.status == HealthStatus.HEALTHY
-            for result in results.values()
-        )
+        while pending and all_ready:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                check = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    result = _failed_result(check.name, e)
+                results[check.name] = result
+                if result.status != HealthStatus.HEALTHY:
+                    all_ready = False
+        
+        # Keep references to abandoned checks until they complete
+        for task in pending:
+            self._inflight_checks.add(task)
+            task.add_done_callback(self._inflight_checks.discard)
         
         return {
             'status': 'ready' if all_ready else 'not_ready',
@@ -377,7 +569,7 @@ async def check_ai_service(ai_service) -> bool:
 async def check_disk_space(min_gb: float = 1.0) -> bool:
     """Health check for disk space"""
     try:
-        disk = psutil.disk_usage('/')
+        disk = _get_disk_usage()
         available_gb = disk.free / (1024 ** 3)
         return available_gb >= min_gb
     except Exception:
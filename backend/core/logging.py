@@ -4,10 +4,15 @@ Production-ready logging with JSON formatting support
 """
 import logging
 import sys
-from typing import Optional
-from datetime import datetime
+import time
+from typing import Dict, Optional
 import json
 
+try:
+    import orjson  # Optional: C-accelerated JSON encoding
+except ImportError:
+    orjson = None
+
 
 class JSONFormatter(logging.Formatter):
     """
@@ -15,9 +20,25 @@ class JSONFormatter(logging.Formatter):
     Enables structured log analysis with tools like ELK, CloudWatch, etc.
     """
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # "YYYY-MM-DDTHH:MM:SS" for the last second seen
+        self._last_ts_sec = -1
+        self._last_ts_str = ""
+    
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        """ISO-8601 UTC timestamp with microseconds and a Z suffix"""
+        second = int(record.created)
+        if second != self._last_ts_sec:
+            self._last_ts_str = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+            self._last_ts_sec = second
+        micros = int((record.created - second) * 1_000_000)
+        return f"{self._last_ts_str}.{micros:06d}Z"
+    
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": self._timestamp(record),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -34,6 +55,8 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, 'extra'):
             log_data.update(record.extra)
         
+        if orjson:
+            return orjson.dumps(log_data).decode()
         return json.dumps(log_data)
 
 
@@ -52,14 +75,38 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
-    def format(self, record: logging.LogRecord) -> str:
-        color = self.COLORS.get(record.levelname, self.RESET)
+    # formatTime() renders HH:MM:SS unless a datefmt is given
+    default_time_format = '%H:%M:%S'
+    default_msec_format = None
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         
-        # Format timestamp
-        timestamp = datetime.now().strftime('%H:%M:%S')
+        # Pre-rendered (color, " │ LEVEL    RESET │ ") pieces per level
+        self._prefixes = {
+            level: (color, f" │ {level:8}{self.RESET} │ ")
+            for level, color in self.COLORS.items()
+        }
+        
+        # Timestamp only changes once per second, so reuse the last one
+        self._last_ts_sec = -1
+        self._last_ts_str = ""
+    
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        second = int(record.created)
+        if second != self._last_ts_sec:
+            self._last_ts_str = self.formatTime(record, self.datefmt)
+            self._last_ts_sec = second
+        return self._last_ts_str
+    
+    def format(self, record: logging.LogRecord) -> str:
+        prefix = self._prefixes.get(record.levelname)
+        if prefix is None:
+            prefix = (self.RESET, f" │ {record.levelname:8}{self.RESET} │ ")
+        color, level_part = prefix
         
         # Build formatted message
-        formatted = f"{color}{timestamp} │ {record.levelname:8}{self.RESET} │ {record.name:20} │ {record.getMessage()}"
+        formatted = f"{color}{self._timestamp(record)}{level_part}{record.name:20} │ {record.getMessage()}"
         
         # Add exception if present
         if record.exc_info:
@@ -110,17 +157,31 @@ def setup_logging(
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
+_loggers: Dict[str, logging.Logger] = {}
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the given name.
     
+    Loggers are configured once on first request: they inherit their
+    level from the root logger and propagate records to the handlers
+    installed by setup_logging(), which must still be called at startup.
+    
     Args:
         name: Logger name (typically __name__)
     
     Returns:
         Configured logger instance
     """
-    return logging.getLogger(name)
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True
+        logger.addHandler(logging.NullHandler())
+        _loggers[name] = logger
+    return logger
 
 
 # Performance logging context manager
@@ -133,6 +194,8 @@ class PerformanceLogger:
             result = db.execute(query)
     """
     
+    __slots__ = ('logger', 'operation', 'threshold_ms', 'start_time')
+    
     def __init__(self, logger: logging.Logger, operation: str, threshold_ms: float = 100):
         self.logger = logger
         self.operation = operation
@@ -140,22 +203,21 @@ class PerformanceLogger:
         self.start_time: Optional[float] = None
     
     def __enter__(self):
-        import time
         self.start_time = time.perf_counter()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        import time
         if self.start_time:
             duration_ms = (time.perf_counter() - self.start_time) * 1000
             
+            # %-style args let logging skip formatting when filtered out
             if duration_ms > self.threshold_ms:
                 self.logger.warning(
-                    f"Slow operation: {self.operation} took {duration_ms:.2f}ms"
+                    "Slow operation: %s took %.2fms", self.operation, duration_ms
                 )
-            else:
+            elif self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug(
-                    f"{self.operation} completed in {duration_ms:.2f}ms"
+                    "%s completed in %.2fms", self.operation, duration_ms
                 )
         
         return False  # Don't suppress exceptions
@@ -9,28 +9,39 @@ Silicon Valley-grade middleware with:
 - Security headers
 """
 import asyncio
-import gzip
-import hashlib
+import heapq
+import math
+import os
+import re
+import sys
 import time
-import uuid
+import zlib
 import logging
-from collections import defaultdict
+from array import array
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Callable, Dict, List, Optional, Tuple, Any
-from functools import wraps
-import json
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Any
 
-from fastapi import FastAPI, Request, Response, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp, Receive, Scope, Send
 
+try:
+    from isal import isal_zlib as _gzip_zlib
+except ImportError:
+    _gzip_zlib = zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class RequestMetrics:
     """Metrics for a single request"""
     request_id: str
@@ -40,12 +51,25 @@ class RequestMetrics:
     response_time_ms: float
     request_size: int
     response_size: int
-    timestamp: datetime
+    timestamp: float  # Unix epoch seconds
     client_ip: str
     user_agent: str
 
 
-@dataclass
+# Latency histogram: log-scale buckets, 8 per doubling, covering 1ms..64s.
+# Bucket i holds samples in [2^(i/8), 2^((i+1)/8)) ms; sub-millisecond
+# samples land in bucket 0 and anything slower in the last one.
+_HIST_BUCKETS = 128
+_HIST_PER_OCTAVE = 8
+
+
+def _latency_bucket(ms: float) -> int:
+    if ms <= 1.0:
+        return 0
+    return min(_HIST_BUCKETS - 1, int(_HIST_PER_OCTAVE * math.log2(ms)))
+
+
+@dataclass(slots=True)
 class EndpointStats:
     """Statistics for an endpoint"""
     total_requests: int = 0
@@ -53,8 +77,11 @@ class EndpointStats:
     total_response_time_ms: float = 0.0
     min_response_time_ms: float = float('inf')
     max_response_time_ms: float = 0.0
-    response_times: List[float] = field(default_factory=list)
+    sum_sq_response_time_ms: float = 0.0
+    latency_buckets: array = field(default_factory=lambda: array('Q', [0]) * _HIST_BUCKETS)
     status_codes: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    # Serialized summary from the last get_metrics; cleared on every write
+    summary: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
     
     @property
     def avg_response_time_ms(self) -> float:
@@ -63,20 +90,51 @@ class EndpointStats:
         return self.total_response_time_ms / self.total_requests
     
     @property
-    def p95_response_time_ms(self) -> float:
-        if not self.response_times:
+    def stddev_response_time_ms(self) -> float:
+        n = self.total_requests
+        if n == 0:
             return 0.0
-        sorted_times = sorted(self.response_times)
-        idx = int(len(sorted_times) * 0.95)
-        return sorted_times[min(idx, len(sorted_times) - 1)]
+        mean = self.total_response_time_ms / n
+        return math.sqrt(max(0.0, self.sum_sq_response_time_ms / n - mean * mean))
+    
+    def percentiles(self, *qs: float) -> List[float]:
+        """
+        Estimate the given percentiles (0-100, ascending) from the histogram
+
+        One pass over the buckets serves every requested quantile. Each
+        estimate is the upper bound of the bucket holding the target
+        rank, clamped to the observed max, so the error is bounded by
+        one bucket width (~9%).
+        """
+        if self.total_requests == 0:
+            return [0.0] * len(qs)
+        results = []
+        targets = iter(qs)
+        target = self.total_requests * next(targets) / 100
+        cumulative = 0
+        for i, count in enumerate(self.latency_buckets):
+            cumulative += count
+            while cumulative >= target:
+                upper = 2 ** ((i + 1) / _HIST_PER_OCTAVE)
+                results.append(min(upper, self.max_response_time_ms))
+                q = next(targets, None)
+                if q is None:
+                    return results
+                target = self.total_requests * q / 100
+        results.extend([self.max_response_time_ms] * (len(qs) - len(results)))
+        return results
+    
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) from the latency histogram"""
+        return self.percentiles(q)[0]
+    
+    @property
+    def p95_response_time_ms(self) -> float:
+        return self.percentile(95)
     
     @property
     def p99_response_time_ms(self) -> float:
-        if not self.response_times:
-            return 0.0
-        sorted_times = sorted(self.response_times)
-        idx = int(len(sorted_times) * 0.99)
-        return sorted_times[min(idx, len(sorted_times) - 1)]
+        return self.percentile(99)
     
     @property
     def error_rate(self) -> float:
@@ -85,97 +143,206 @@ class EndpointStats:
         return self.total_errors / self.total_requests
 
 
+def _endpoint_summary(stats: EndpointStats) -> Dict[str, Any]:
+    """
+    Serialize one endpoint's stats for get_metrics
+
+    The result is cached on the stats until the next request for that
+    endpoint, so idle endpoints cost nothing on later scrapes.
+    """
+    p95, p99 = stats.percentiles(95, 99)
+    stats.summary = {
+        'total_requests': stats.total_requests,
+        'total_errors': stats.total_errors,
+        'error_rate': round(stats.error_rate * 100, 2),
+        'avg_response_time_ms': round(stats.avg_response_time_ms, 2),
+        'stddev_response_time_ms': round(stats.stddev_response_time_ms, 2),
+        'min_response_time_ms': round(stats.min_response_time_ms, 2) if stats.min_response_time_ms != float('inf') else 0,
+        'max_response_time_ms': round(stats.max_response_time_ms, 2),
+        'p95_response_time_ms': round(p95, 2),
+        'p99_response_time_ms': round(p99, 2),
+        'status_codes': dict(stats.status_codes)
+    }
+    return stats.summary
+
+
+# Upper bound on interned endpoint keys; beyond it keys are built per call
+_KEY_CACHE_MAX = 10000
+
+
 class MetricsCollector:
     """
     Centralized metrics collection for the application
-    Thread-safe and performant
+
+    Single-writer by design: every method runs on the event loop and none
+    of them awaits while touching shared state, so each call completes
+    atomically with respect to other coroutines and no lock is needed.
+    Share one instance per event loop, not across threads.
     """
     
-    def __init__(self, max_history: int = 10000):
+    def __init__(
+        self,
+        max_history: int = 10000,
+        ring_size: int = 4096,
+        drain_interval: float = 1.0
+    ):
         self.max_history = max_history
         self._endpoint_stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
         self._recent_requests: List[RequestMetrics] = []
-        self._lock = asyncio.Lock()
-        self._start_time = datetime.now()
+        self._total_requests = 0
+        self._total_errors = 0
+        self._start_time = time.monotonic()
+
+        # Ring buffer filled by the middleware and folded into the stats by
+        # a single drain task. Size is rounded up to a power of two so the
+        # slot index is a mask rather than a modulo.
+        ring_size = 1 << max(0, ring_size - 1).bit_length()
+        self._ring: List[Optional[RequestMetrics]] = [None] * ring_size
+        self._ring_mask = ring_size - 1
+        self._write_idx = 0
+        self._read_idx = 0
+        self.drain_interval = drain_interval
+        self._drain_task: Optional[asyncio.Task] = None
+
+        # (method, path) -> interned "METHOD:path" key, so repeat routes
+        # skip the f-string and hash a string whose hash is cached
+        self._key_cache: Dict[Tuple[str, str], str] = {}
     
+    def record_request_fast(self, metrics: RequestMetrics) -> None:
+        """
+        Queue request metrics from the hot path without creating a task
+
+        Only writes a ring slot and bumps the write index; the background
+        drain loop (started on first use) does the aggregation in batches.
+        If more than ``ring_size`` samples pile up between drains the
+        oldest are overwritten.
+        """
+        idx = self._write_idx
+        self._ring[idx & self._ring_mask] = metrics
+        self._write_idx = idx + 1
+
+        task = self._drain_task
+        if task is None or task.done():
+            self._drain_task = asyncio.get_running_loop().create_task(self._drain_loop())
+
+    async def _drain_loop(self) -> None:
+        """Periodically fold queued samples into the endpoint stats"""
+        while True:
+            await asyncio.sleep(self.drain_interval)
+            self._drain()
+
+    async def close(self) -> None:
+        """Stop the drain task and fold in any samples still queued (on shutdown)"""
+        task = self._drain_task
+        self._drain_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._drain()
+
+    def _drain(self) -> None:
+        """Aggregate every sample written since the last drain"""
+        write_idx = self._write_idx
+        read_idx = max(self._read_idx, write_idx - len(self._ring))
+        ring = self._ring
+        mask = self._ring_mask
+        for i in range(read_idx, write_idx):
+            slot = i & mask
+            metrics = ring[slot]
+            ring[slot] = None
+            if metrics is not None:
+                self._record(metrics)
+        self._read_idx = write_idx
+
     async def record_request(self, metrics: RequestMetrics) -> None:
-        """Record metrics for a request"""
-        async with self._lock:
-            endpoint_key = f"{metrics.method}:{metrics.path}"
-            stats = self._endpoint_stats[endpoint_key]
-            
-            stats.total_requests += 1
-            stats.total_response_time_ms += metrics.response_time_ms
-            stats.min_response_time_ms = min(stats.min_response_time_ms, metrics.response_time_ms)
-            stats.max_response_time_ms = max(stats.max_response_time_ms, metrics.response_time_ms)
-            stats.status_codes[metrics.status_code] += 1
-            
-            if metrics.status_code >= 400:
-                stats.total_errors += 1
-            
-            # Keep response times for percentile calculations (limit memory)
-            stats.response_times.append(metrics.response_time_ms)
-            if len(stats.response_times) > 1000:
-                stats.response_times = stats.response_times[-500:]
-            
-            # Keep recent requests
-            self._recent_requests.append(metrics)
-            if len(self._recent_requests) > self.max_history:
-                self._recent_requests = self._recent_requests[-self.max_history // 2:]
-    
+        """Record metrics for a request immediately"""
+        self._record(metrics)
+
+    def _record(self, metrics: RequestMetrics) -> None:
+        """Fold one request into the endpoint stats"""
+        route = (metrics.method, metrics.path)
+        endpoint_key = self._key_cache.get(route)
+        if endpoint_key is None:
+            endpoint_key = sys.intern(f"{metrics.method}:{metrics.path}")
+            if len(self._key_cache) < _KEY_CACHE_MAX:
+                self._key_cache[route] = endpoint_key
+        stats = self._endpoint_stats[endpoint_key]
+        stats.summary = None
+        response_time_ms = metrics.response_time_ms
+
+        stats.total_requests += 1
+        stats.total_response_time_ms += response_time_ms
+        stats.sum_sq_response_time_ms += response_time_ms * response_time_ms
+        self._total_requests += 1
+        if response_time_ms < stats.min_response_time_ms:
+            stats.min_response_time_ms = response_time_ms
+        if response_time_ms > stats.max_response_time_ms:
+            stats.max_response_time_ms = response_time_ms
+        stats.status_codes[metrics.status_code] += 1
+
+        if metrics.status_code >= 400:
+            stats.total_errors += 1
+            self._total_errors += 1
+
+        # Histogram for percentile estimates (fixed footprint)
+        stats.latency_buckets[_latency_bucket(response_time_ms)] += 1
+
+        # Keep recent requests
+        self._recent_requests.append(metrics)
+        if len(self._recent_requests) > self.max_history:
+            self._recent_requests = self._recent_requests[-self.max_history // 2:]
+
     async def get_metrics(self) -> Dict[str, Any]:
         """Get all collected metrics"""
-        async with self._lock:
-            uptime = datetime.now() - self._start_time
-            total_requests = sum(s.total_requests for s in self._endpoint_stats.values())
-            total_errors = sum(s.total_errors for s in self._endpoint_stats.values())
-            
-            return {
-                'uptime_seconds': uptime.total_seconds(),
-                'total_requests': total_requests,
-                'total_errors': total_errors,
-                'error_rate': total_errors / total_requests if total_requests > 0 else 0,
-                'endpoints': {
-                    endpoint: {
-                        'total_requests': stats.total_requests,
-                        'total_errors': stats.total_errors,
-                        'error_rate': round(stats.error_rate * 100, 2),
-                        'avg_response_time_ms': round(stats.avg_response_time_ms, 2),
-                        'min_response_time_ms': round(stats.min_response_time_ms, 2) if stats.min_response_time_ms != float('inf') else 0,
-                        'max_response_time_ms': round(stats.max_response_time_ms, 2),
-                        'p95_response_time_ms': round(stats.p95_response_time_ms, 2),
-                        'p99_response_time_ms': round(stats.p99_response_time_ms, 2),
-                        'status_codes': dict(stats.status_codes)
-                    }
-                    for endpoint, stats in sorted(
-                        self._endpoint_stats.items(),
-                        key=lambda x: x[1].total_requests,
-                        reverse=True
-                    )[:20]  # Top 20 endpoints
-                },
-                'recent_slow_requests': [
-                    {
-                        'request_id': r.request_id,
-                        'method': r.method,
-                        'path': r.path,
-                        'response_time_ms': round(r.response_time_ms, 2),
-                        'status_code': r.status_code,
-                        'timestamp': r.timestamp.isoformat()
-                    }
-                    for r in sorted(
-                        self._recent_requests[-100:],
-                        key=lambda x: x.response_time_ms,
-                        reverse=True
-                    )[:10]
-                ]
-            }
+        self._drain()
+        uptime_seconds = time.monotonic() - self._start_time
+        total_requests = self._total_requests
+        total_errors = self._total_errors
+        
+        return {
+            'uptime_seconds': uptime_seconds,
+            'total_requests': total_requests,
+            'total_errors': total_errors,
+            'error_rate': total_errors / total_requests if total_requests > 0 else 0,
+            'endpoints': {
+                endpoint: stats.summary or _endpoint_summary(stats)
+                for endpoint, stats in heapq.nlargest(
+                    20,  # Top 20 endpoints
+                    self._endpoint_stats.items(),
+                    key=lambda x: x[1].total_requests
+                )
+            },
+            'recent_slow_requests': [
+                {
+                    'request_id': r.request_id,
+                    'method': r.method,
+                    'path': r.path,
+                    'response_time_ms': round(r.response_time_ms, 2),
+                    'status_code': r.status_code,
+                    'timestamp': datetime.fromtimestamp(r.timestamp).isoformat()
+                }
+                for r in heapq.nlargest(
+                    10,
+                    self._recent_requests[-100:],
+                    key=lambda x: x.response_time_ms
+                )
+            ]
+        }
     
     async def reset_metrics(self) -> None:
         """Reset all metrics"""
-        async with self._lock:
-            self._endpoint_stats.clear()
-            self._recent_requests.clear()
-            self._start_time = datetime.now()
+        # Swap in fresh containers rather than clearing in place so a
+        # snapshot already holding references keeps a consistent view
+        self._endpoint_stats = defaultdict(EndpointStats)
+        self._recent_requests = []
+        self._total_requests = 0
+        self._total_errors = 0
+        self._ring = [None] * len(self._ring)
+        self._read_idx = self._write_idx
+        self._start_time = time.monotonic()
 
 
 # Global metrics collector
@@ -189,15 +356,18 @@ class TimingMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Generate request ID
-        request_id = str(uuid.uuid4())[:8]
+        request_id = os.urandom(4).hex()
         request.state.request_id = request_id
         
         # Record start time
         start_time = time.perf_counter()
         
         # Get request info
+        request_headers = request.headers
         client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
+        user_agent = request_headers.get("user-agent", "unknown")
+        content_length = request_headers.get("content-length")
+        request_size = int(content_length) if content_length else 0
         
         try:
             response = await call_next(request)
@@ -210,14 +380,20 @@ class TimingMiddleware(BaseHTTPMiddleware):
         # Calculate elapsed time
         elapsed_ms = (time.perf_counter() - start_time) * 1000
         
-        # Add timing headers
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Response-Time"] = f"{elapsed_ms:.2f}ms"
-        response.headers["X-Server-Timing"] = f"total;dur={elapsed_ms:.2f}"
+        # Add timing headers (pre-encoded, duration formatted once)
+        duration = f"{elapsed_ms:.2f}".encode()
+        response.raw_headers.extend((
+            (b"x-request-id", request_id.encode()),
+            (b"x-response-time", duration + b"ms"),
+            (b"x-server-timing", b"total;dur=" + duration),
+        ))
         
-        # Record metrics
-        request_size = int(request.headers.get("content-length", 0))
-        response_size = int(response.headers.get("content-length", 0))
+        # Record metrics (streamed responses carry no content-length)
+        response_size = 0
+        for name, value in response.raw_headers:
+            if name == b"content-length":
+                response_size = int(value)
+                break
         
         metrics = RequestMetrics(
             request_id=request_id,
@@ -227,13 +403,13 @@ class TimingMiddleware(BaseHTTPMiddleware):
             response_time_ms=elapsed_ms,
             request_size=request_size,
             response_size=response_size,
-            timestamp=datetime.now(),
+            timestamp=time.time(),
             client_ip=client_ip,
             user_agent=user_agent[:100]
         )
         
-        # Record asynchronously
-        asyncio.create_task(metrics_collector.record_request(metrics))
+        # Queue for the background drain loop
+        metrics_collector.record_request_fast(metrics)
         
         # Log slow requests
         if elapsed_ms > 1000:
@@ -242,110 +418,229 @@ class TimingMiddleware(BaseHTTPMiddleware):
         return response
 
 
+# wbits value that makes zlib/ISA-L emit a gzip header and trailer
+_GZIP_WBITS = 31
+
+# ASGI header names are lowercase bytes, so these compare without decoding
+_SKIP_HDRS = frozenset((b"content-length", b"content-encoding"))
+_COMPRESSIBLE_CT = (
+    b"application/json",
+    b"text/plain",
+    b"text/html",
+    b"text/css",
+    b"application/javascript",
+)
+
+
 class CompressionMiddleware:
     """
-    Response compression middleware supporting gzip
+    Response compression middleware supporting gzip and zstd
+
+    gzip goes through ISA-L when it is installed (same output, SIMD
+    accelerated) and stdlib zlib otherwise; zstd is offered when the
+    ``zstandard`` package is available and the client accepts it.
+
+    Single-message responses are compressed in one shot, in the default
+    executor when larger than ``executor_threshold``. Streamed responses
+    are compressed chunk by chunk and flushed after each ASGI message, so
+    nothing is buffered and the first bytes go out as soon as the
+    handler produces them.
     """
     
     def __init__(
         self,
         app: ASGIApp,
         minimum_size: int = 500,
-        compression_level: int = 6
+        compression_level: int = 6,
+        zstd_level: int = 3,
+        executor_threshold: int = 64 * 1024
     ):
         self.app = app
         self.minimum_size = minimum_size
         self.compression_level = compression_level
+        # ISA-L only implements levels 0-3; stdlib zlib keeps the requested level
+        self.gzip_level = min(
+            compression_level,
+            getattr(_gzip_zlib, "ISAL_BEST_COMPRESSION", zlib.Z_BEST_COMPRESSION)
+        )
+        self.zstd_level = zstd_level
+        self.executor_threshold = executor_threshold
+    
+    @staticmethod
+    def _parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+        """Map each content-coding in an Accept-Encoding header to its q-value"""
+        codings: Dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.partition(";")
+            name = name.strip()
+            if not name:
+                continue
+            q = 1.0
+            for param in params.split(";"):
+                key, _, value = param.partition("=")
+                if key.strip() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            codings[name] = q
+        return codings
+    
+    def _select_encoding(self, accept_encoding: str) -> Optional[str]:
+        codings = self._parse_accept_encoding(accept_encoding)
+        wildcard = codings.get("*", 0.0)
+        gzip_q = codings.get("gzip", wildcard)
+        zstd_q = codings.get("zstd", wildcard) if zstandard is not None else 0.0
+        # q=0 means "not acceptable"; on a tie prefer zstd
+        if zstd_q > 0 and zstd_q >= gzip_q:
+            return "zstd"
+        if gzip_q > 0:
+            return "gzip"
+        return None
+    
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        return _gzip_zlib.compress(body, self.gzip_level, _GZIP_WBITS)
+    
+    def _stream_compressor(self, encoding: str) -> Callable[[bytes, bool], bytes]:
+        """Return ``compress(chunk, final)`` that flushes after every chunk"""
+        if encoding == "zstd":
+            zobj = zstandard.ZstdCompressor(level=self.zstd_level).compressobj()
+            flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            
+            def compress(chunk: bytes, final: bool) -> bytes:
+                return zobj.compress(chunk) + (zobj.flush() if final else zobj.flush(flush_block))
+        else:
+            gobj = _gzip_zlib.compressobj(
+                self.gzip_level, _gzip_zlib.DEFLATED, _GZIP_WBITS
+            )
+            
+            def compress(chunk: bytes, final: bool) -> bytes:
+                mode = _gzip_zlib.Z_FINISH if final else _gzip_zlib.Z_SYNC_FLUSH
+                return gobj.compress(chunk) + gobj.flush(mode)
+        return compress
+    
+    @staticmethod
+    def _encoded_headers(
+        headers: List[Tuple[bytes, bytes]],
+        encoding: str,
+        content_length: Optional[int] = None
+    ) -> List[Tuple[bytes, bytes]]:
+        new_headers = [(name, value) for name, value in headers if name not in _SKIP_HDRS]
+        
+        new_headers.append((b"content-encoding", encoding.encode()))
+        if content_length is not None:
+            new_headers.append((b"content-length", str(content_length).encode()))
+        new_headers.append((b"vary", b"Accept-Encoding"))
+        return new_headers
     
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
         
-        # Check if client accepts gzip
+        # Pick an encoding the client accepts
         headers = dict(scope.get("headers", []))
-        accept_encoding = headers.get(b"accept-encoding", b"").decode()
+        accept_encoding = headers.get(b"accept-encoding", b"").decode().lower()
+        encoding = self._select_encoding(accept_encoding)
         
-        if "gzip" not in accept_encoding.lower():
+        if encoding is None:
             await self.app(scope, receive, send)
             return
         
         # Intercept response to compress
-        response_started = False
-        response_headers: List[Tuple[bytes, bytes]] = []
-        response_body: List[bytes] = []
+        response_start: Dict = {}
+        passthrough = False
+        stream_compress: Optional[Callable[[bytes, bool], bytes]] = None
         
         async def send_wrapper(message: Dict) -> None:
-            nonlocal response_started, response_headers, response_body
+            nonlocal response_start, passthrough, stream_compress
             
             if message["type"] == "http.response.start":
-                response_headers = list(message.get("headers", []))
-                # Don't send yet - wait for body
+                # Don't send yet - the first body message decides the mode
+                response_start = message
                 return
             
-            elif message["type"] == "http.response.body":
-                body = message.get("body", b"")
-                more_body = message.get("more_body", False)
-                response_body.append(body)
-                
-                if more_body:
-                    return
-                
-                # Combine body
-                full_body = b"".join(response_body)
-                
-                # Check if we should compress
-                content_type = ""
-                for name, value in response_headers:
-                    if name.lower() == b"content-type":
-                        content_type = value.decode()
-                        break
-                
-                compressible_types = [
-                    "application/json",
-                    "text/plain",
-                    "text/html",
-                    "text/css",
-                    "application/javascript"
-                ]
-                
-                should_compress = (
-                    len(full_body) >= self.minimum_size and
-                    any(ct in content_type for ct in compressible_types)
-                )
-                
-                if should_compress:
-                    # Compress body
-                    compressed = gzip.compress(full_body, compresslevel=self.compression_level)
-                    
-                    # Update headers
-                    new_headers = []
-                    for name, value in response_headers:
-                        if name.lower() not in [b"content-length", b"content-encoding"]:
-                            new_headers.append((name, value))
-                    
-                    new_headers.append((b"content-encoding", b"gzip"))
-                    new_headers.append((b"content-length", str(len(compressed)).encode()))
-                    new_headers.append((b"vary", b"Accept-Encoding"))
-                    
-                    full_body = compressed
-                    response_headers = new_headers
-                
-                # Send response
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            
+            if stream_compress is not None:
                 await send({
-                    "type": "http.response.start",
-                    "status": message.get("status", 200),
-                    "headers": response_headers
+                    "type": "http.response.body",
+                    "body": stream_compress(body, not more_body),
+                    "more_body": more_body
+                })
+                return
+            
+            # First body message: check if we should compress
+            response_headers = list(response_start.get("headers", []))
+            content_type = b""
+            already_encoded = False
+            for name, value in response_headers:
+                if name == b"content-type":
+                    content_type = value
+                elif name == b"content-encoding":
+                    already_encoded = True
+            
+            should_compress = (
+                not already_encoded and
+                (more_body or len(body) >= self.minimum_size) and
+                any(ct in content_type for ct in _COMPRESSIBLE_CT)
+            )
+            
+            if not should_compress:
+                passthrough = True
+                await send(response_start)
+                await send(message)
+                return
+            
+            if more_body:
+                # Streamed response: length is unknown, compress as it arrives
+                stream_compress = self._stream_compressor(encoding)
+                await send({
+                    **response_start,
+                    "headers": self._encoded_headers(response_headers, encoding)
                 })
-                
                 await send({
                     "type": "http.response.body",
-                    "body": full_body
+                    "body": stream_compress(body, False),
+                    "more_body": True
                 })
+                return
+            
+            # Whole body in one message: compress in one shot, off the
+            # event loop when it is large
+            if len(body) >= self.executor_threshold:
+                loop = asyncio.get_running_loop()
+                compressed = await loop.run_in_executor(None, self._compress, body, encoding)
+            else:
+                compressed = self._compress(body, encoding)
+            
+            await send({
+                **response_start,
+                "headers": self._encoded_headers(response_headers, encoding, len(compressed))
+            })
+            await send({
+                "type": "http.response.body",
+                "body": compressed
+            })
         
         await self.app(scope, receive, send_wrapper)
 
 
+# Path prefixes exempt from rate limiting, as one anchored alternation
+_RATE_LIMIT_SKIP_PATHS = ("/api/health", "/api/metrics", "/docs", "/openapi.json")
+_RATE_LIMIT_SKIP_RE = re.compile("|".join(map(re.escape, _RATE_LIMIT_SKIP_PATHS)))
+_RATE_LIMIT_SHARDS = 32
+# 429 body as a bytes template; only retry_after varies
+_RATE_LIMIT_BODY = b'{"error": "Rate limit exceeded", "retry_after": %d}'
+
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
     Rate limiting middleware with sliding window algorithm
@@ -361,41 +656,41 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         self.requests_per_minute = requests_per_minute
         self.burst_size = burst_size
         self.window_size = 60  # seconds
-        self._request_counts: Dict[str, List[float]] = defaultdict(list)
-        self._lock = asyncio.Lock()
+        # Per-client windows split across independent (lock, table) shards
+        # so unrelated clients never wait on each other. Power of two so
+        # the shard index is a mask.
+        self._shards: List[Tuple[asyncio.Lock, Dict[str, Deque[float]]]] = [
+            (asyncio.Lock(), defaultdict(deque)) for _ in range(_RATE_LIMIT_SHARDS)
+        ]
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Get client identifier
         client_ip = request.client.host if request.client else "unknown"
         
         # Skip rate limiting for certain paths
-        skip_paths = ["/api/health", "/api/metrics", "/docs", "/openapi.json"]
-        if any(request.url.path.startswith(p) for p in skip_paths):
+        if _RATE_LIMIT_SKIP_RE.match(request.url.path):
             return await call_next(request)
         
-        async with self._lock:
+        lock, request_counts = self._shards[hash(client_ip) & (_RATE_LIMIT_SHARDS - 1)]
+        async with lock:
             now = time.time()
             window_start = now - self.window_size
             
-            # Clean old requests
-            self._request_counts[client_ip] = [
-                ts for ts in self._request_counts[client_ip]
-                if ts > window_start
-            ]
+            # Timestamps are appended in order, so expired ones sit on the left
+            timestamps = request_counts[client_ip]
+            while timestamps and timestamps[0] <= window_start:
+                timestamps.popleft()
             
             # Check rate limit
-            request_count = len(self._request_counts[client_ip])
+            request_count = len(timestamps)
             
             if request_count >= self.requests_per_minute:
                 # Calculate retry-after
-                oldest = min(self._request_counts[client_ip])
+                oldest = timestamps[0]
                 retry_after = int(oldest + self.window_size - now) + 1
                 
                 return Response(
-                    content=json.dumps({
-                        "error": "Rate limit exceeded",
-                        "retry_after": retry_after
-                    }),
+                    content=_RATE_LIMIT_BODY % retry_after,
                     status_code=429,
                     headers={
                         "Content-Type": "application/json",
@@ -407,19 +702,40 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 )
             
             # Record this request
-            self._request_counts[client_ip].append(now)
+            timestamps.append(now)
         
         # Process request
         response = await call_next(request)
         
         # Add rate limit headers
-        remaining = self.requests_per_minute - len(self._request_counts.get(client_ip, []))
+        remaining = self.requests_per_minute - len(timestamps)
         response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
         response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
         
         return response
 
 
+# Pre-encoded (name, value) pairs appended straight to response.raw_headers,
+# skipping MutableHeaders' per-assignment encode and scan
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+_SECURITY_HEADER_NAMES = frozenset(name for name, _ in _SECURITY_HEADERS)
+_CACHE_CONTROL = b"cache-control"
+_CACHE_NOSTORE = (_CACHE_CONTROL, b"no-store")
+_CACHE_NOSTORE_API = (_CACHE_CONTROL, b"no-store, max-age=0")
+
+
+def _set_raw_header(raw_headers: List[Tuple[bytes, bytes]], header: Tuple[bytes, bytes]) -> None:
+    """Replace any existing value of ``header``'s name, in place"""
+    name = header[0]
+    raw_headers[:] = [h for h in raw_headers if h[0] != name]
+    raw_headers.append(header)
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """
     Add security headers to all responses
@@ -428,18 +744,26 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         response = await call_next(request)
         
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        # Add security headers (one pass drops any values set upstream).
+        # Mutate in place: response.headers is a view over this list.
+        raw_headers = response.raw_headers
+        has_cache_control = False
+        kept = []
+        for header in raw_headers:
+            name = header[0]
+            if name == _CACHE_CONTROL:
+                has_cache_control = True
+            if name not in _SECURITY_HEADER_NAMES:
+                kept.append(header)
+        kept.extend(_SECURITY_HEADERS)
         
         # Cache control for API responses
         if request.url.path.startswith("/api/"):
             # Default: no caching for dynamic content
-            if "Cache-Control" not in response.headers:
-                response.headers["Cache-Control"] = "no-store, max-age=0"
+            if not has_cache_control:
+                kept.append(_CACHE_NOSTORE_API)
         
+        raw_headers[:] = kept
         return response
 
 
@@ -455,19 +779,24 @@ class CacheControlMiddleware(BaseHTTPMiddleware):
         "/api/health": 10,  # 10 seconds
     }
     
+    _CACHE_HEADERS = {
+        endpoint: (_CACHE_CONTROL, f"public, max-age={max_age}".encode())
+        for endpoint, max_age in CACHEABLE_ENDPOINTS.items()
+    }
+    _CACHEABLE_RE = re.compile("|".join(map(re.escape, CACHEABLE_ENDPOINTS)))
+    
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         response = await call_next(request)
         
         # Only cache GET requests
         if request.method != "GET":
-            response.headers["Cache-Control"] = "no-store"
+            _set_raw_header(response.raw_headers, _CACHE_NOSTORE)
             return response
         
         # Check if this endpoint should be cached
-        for endpoint, max_age in self.CACHEABLE_ENDPOINTS.items():
-            if request.url.path.startswith(endpoint):
-                response.headers["Cache-Control"] = f"public, max-age={max_age}"
-                return response
+        match = self._CACHEABLE_RE.match(request.url.path)
+        if match:
+            _set_raw_header(response.raw_headers, self._CACHE_HEADERS[match.group()])
         
         return response
 
@@ -492,4 +821,7 @@ def setup_middleware(app: FastAPI) -> None:
     # Compression - wrap the app
     # Note: This should be added via app = CompressionMiddleware(app)
     
+    # Stop the metrics drain task (apps with a lifespan call metrics_collector.close() there)
+    app.add_event_handler("shutdown", metrics_collector.close)
+    
     logger.info("✅ Performance middleware stack configured")
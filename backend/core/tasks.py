@@ -8,16 +8,17 @@ Silicon Valley-grade background task processing with:
 - Graceful shutdown
 """
 import asyncio
+import heapq
+import itertools
 import logging
+import random
+import secrets
 import time
-import uuid
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Awaitable
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from functools import wraps
-import traceback
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +41,7 @@ class TaskPriority(Enum):
     CRITICAL = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskResult:
     """Result of a task execution"""
     success: bool
@@ -49,7 +50,7 @@ class TaskResult:
     execution_time_ms: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """Represents a background task"""
     id: str
@@ -64,12 +65,14 @@ class Task:
     max_retries: int = 3
     retry_count: int = 0
     retry_delay: float = 1.0  # Base delay in seconds
-    retry_backoff: float = 2.0  # Exponential backoff multiplier
+    retry_backoff: float = 3.0  # Upper bound growth per retry (decorrelated jitter)
+    retry_delay_cap: float = 60.0  # Maximum delay in seconds
+    last_retry_delay: float = 0.0
     
-    # Timing
-    created_at: datetime = field(default_factory=datetime.now)
-    started_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
+    # Timing (Unix epoch seconds)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
     
     # Result
     result: Optional[TaskResult] = None
@@ -82,12 +85,43 @@ class Task:
     # Dependencies
     depends_on: List[str] = field(default_factory=list)
     
-    def __lt__(self, other: 'Task') -> bool:
-        """Compare tasks by priority for queue ordering"""
-        return self.priority.value > other.priority.value
+    # Serialized forms, written once at each transition so status reads
+    # never re-format timestamps or resolve the Enum
+    priority_key: int = field(default=0, init=False, repr=False)  # Heap key, -priority
+    status_value: str = field(default="", init=False, repr=False)
+    created_at_iso: str = field(default="", init=False, repr=False)
+    started_at_iso: Optional[str] = field(default=None, init=False, repr=False)
+    completed_at_iso: Optional[str] = field(default=None, init=False, repr=False)
+    
+    def __post_init__(self) -> None:
+        self.priority_key = -self.priority.value
+        self.status_value = self.status.value
+        self.created_at_iso = datetime.fromtimestamp(self.created_at).isoformat()
+    
+    def set_status(self, status: TaskStatus) -> None:
+        self.status = status
+        self.status_value = status.value
+    
+    def mark_started(self) -> None:
+        self.set_status(TaskStatus.RUNNING)
+        self.started_at = time.time()
+        self.started_at_iso = datetime.fromtimestamp(self.started_at).isoformat()
+    
+    def mark_finished(self, status: TaskStatus) -> None:
+        self.set_status(status)
+        self.completed_at = time.time()
+        self.completed_at_iso = datetime.fromtimestamp(self.completed_at).isoformat()
 
 
-@dataclass 
+@dataclass(slots=True)
+class DependencyNode:
+    """Readiness bookkeeping for a task in the dependency graph"""
+    task_id: str
+    pending_deps: Set[str] = field(default_factory=set)
+    dependents: Set[str] = field(default_factory=set)
+
+
+@dataclass(slots=True)
 class TaskStats:
     """Task manager statistics"""
     total_tasks: int = 0
@@ -116,21 +150,54 @@ class BackgroundTaskManager:
     - Concurrent workers
     - Retry logic
     - Progress tracking
+    
+    Bound to a single event loop. Bookkeeping on the task tables never
+    awaits midway, so it needs no lock; only the ready queue has one,
+    because its conditions must be able to wait.
     """
     
     def __init__(
         self,
         max_workers: int = 4,
-        max_queue_size: int = 1000
+        max_queue_size: int = 1000,
+        batch_size: int = 8
     ):
         self.max_workers = max_workers
         self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
         
-        self._queue: asyncio.PriorityQueue[Task] = asyncio.PriorityQueue(maxsize=max_queue_size)
+        # Ready queue: heap of (priority_key, seq, task). The integer key is
+        # computed once per task and seq keeps FIFO order within a priority,
+        # so ordering never touches the Enum or the Task itself.
+        self._heap: List[Tuple[int, int, Task]] = []
+        self._seq = itertools.count()
+        self._queue_lock = asyncio.Lock()
+        self._not_empty = asyncio.Condition(self._queue_lock)
+        self._not_full = asyncio.Condition(self._queue_lock)
         self._tasks: Dict[str, Task] = {}
+        # Task ids: random per-instance prefix plus a counter, so ids are
+        # unique within the manager and unlikely to repeat across restarts
+        self._id_prefix = secrets.token_hex(2)
+        self._id_counter = itertools.count(1)
+        # Incremental indices over _tasks. All are insertion-ordered dicts
+        # used as ordered sets: _tasks itself is in creation order, _active
+        # holds unfinished ids in creation order and _finished holds
+        # finished ids in completion (hence completed_at) order.
+        self._active: Dict[str, None] = {}
+        self._finished: Dict[str, None] = {}
+        # Completion events for wait_for_task, created only when awaited
+        self._done_events: Dict[str, asyncio.Event] = {}
+        # Tasks with dependencies; a task is only queued once its
+        # pending_deps set drains, so workers never see an unready task
+        self._dep_graph: Dict[str, DependencyNode] = {}
         self._workers: List[asyncio.Task] = []
+        # Delayed retries: (ready_at, seq, task) heap served by one
+        # scheduler coroutine instead of a sleeping Task per retry
+        self._retry_heap: List[Tuple[float, int, Task]] = []
+        self._retry_seq = itertools.count()
+        self._retry_wakeup = asyncio.Event()
+        self._retry_scheduler_task: Optional[asyncio.Task] = None
         self._running = False
-        self._lock = asyncio.Lock()
         
         self.stats = TaskStats()
     
@@ -146,57 +213,105 @@ class BackgroundTaskManager:
             worker = asyncio.create_task(self._worker(f"worker-{i}"))
             self._workers.append(worker)
         
+        self._retry_scheduler_task = asyncio.create_task(self._retry_scheduler())
+        
         logger.info(f"✅ Background task manager started with {self.max_workers} workers")
     
     async def stop(self, wait_for_completion: bool = True) -> None:
         """Stop the task manager"""
         self._running = False
         
-        if wait_for_completion:
-            # Wait for queue to empty
-            while not self._queue.empty():
-                await asyncio.sleep(0.1)
-        
-        # Cancel workers
-        for worker in self._workers:
-            worker.cancel()
+        # Pending retries are dropped with the scheduler
+        if self._retry_scheduler_task is not None:
+            self._retry_scheduler_task.cancel()
             try:
-                await worker
+                await self._retry_scheduler_task
             except asyncio.CancelledError:
                 pass
+            self._retry_scheduler_task = None
+        
+        if wait_for_completion:
+            # Wake idle workers; they drain the queue, then exit on their own
+            async with self._queue_lock:
+                self._not_empty.notify_all()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        else:
+            for worker in self._workers:
+                worker.cancel()
+                try:
+                    await worker
+                except asyncio.CancelledError:
+                    pass
         
         self._workers.clear()
         logger.info("🔌 Background task manager stopped")
     
+    async def _put(self, task: Task) -> None:
+        """Queue a newly submitted task, waiting while the queue is full"""
+        async with self._queue_lock:
+            while len(self._heap) >= self.max_queue_size:
+                await self._not_full.wait()
+            heapq.heappush(self._heap, (task.priority_key, next(self._seq), task))
+            self._not_empty.notify()
+    
+    async def _requeue(self, task: Task) -> None:
+        """
+        Queue an already admitted task (ready dependent or retry)
+
+        Bypasses the size bound: these come from workers and the retry
+        scheduler, which would deadlock waiting on themselves to drain it.
+        """
+        async with self._queue_lock:
+            heapq.heappush(self._heap, (task.priority_key, next(self._seq), task))
+            self._not_empty.notify()
+    
+    async def _get_batch(self) -> List[Task]:
+        """
+        Pop up to ``batch_size`` tasks in priority order, waiting for one
+
+        Takes no more than an even share of the backlog so one worker
+        does not hoard tasks while the others sit idle. Tasks cancelled
+        while queued are dropped here. Returns an empty list once the
+        manager is stopped and the queue is empty.
+        """
+        async with self._queue_lock:
+            heap = self._heap
+            while True:
+                while not heap:
+                    if not self._running:
+                        return []
+                    await self._not_empty.wait()
+                share = -(-len(heap) // self.max_workers)
+                wanted = min(self.batch_size, share)
+                batch = []
+                popped = 0
+                while heap and len(batch) < wanted:
+                    task = heapq.heappop(heap)[2]
+                    popped += 1
+                    if task.status is TaskStatus.PENDING:
+                        batch.append(task)
+                self._not_full.notify(popped)
+                if batch:
+                    return batch
+    
     async def _worker(self, worker_name: str) -> None:
         """Worker coroutine that processes tasks"""
-        logger.debug(f"Worker {worker_name} started")
+        logger.debug("Worker %s started", worker_name)
+        
+        # Bound once: the loop runs for the lifetime of the manager
+        get_batch = self._get_batch
+        execute_task = self._execute_task
         
-        while self._running:
+        while True:
             try:
-                # Get task with timeout
-                try:
-                    task = await asyncio.wait_for(
-                        self._queue.get(),
-                        timeout=1.0
-                    )
-                except asyncio.TimeoutError:
-                    continue
-                
-                # Check dependencies
-                if task.depends_on:
-                    deps_complete = all(
-                        self._tasks.get(dep_id, Task(id='', name='', func=lambda: None)).status == TaskStatus.COMPLETED
-                        for dep_id in task.depends_on
-                    )
-                    if not deps_complete:
-                        # Re-queue task
-                        await self._queue.put(task)
-                        await asyncio.sleep(0.1)
-                        continue
+                # Sleeps on the condition until work arrives or stop()
+                batch = await get_batch()
+                if not batch:
+                    break
                 
-                # Execute task
-                await self._execute_task(task, worker_name)
+                # Execute tasks
+                for task in batch:
+                    await execute_task(task, worker_name)
                 
             except asyncio.CancelledError:
                 break
@@ -204,16 +319,17 @@ class BackgroundTaskManager:
                 logger.error(f"Worker {worker_name} error: {e}")
                 await asyncio.sleep(0.1)
         
-        logger.debug(f"Worker {worker_name} stopped")
+        logger.debug("Worker %s stopped", worker_name)
     
     async def _execute_task(self, task: Task, worker_name: str) -> None:
         """Execute a single task"""
-        task.status = TaskStatus.RUNNING
-        task.started_at = datetime.now()
+        if task.status is not TaskStatus.PENDING:
+            return  # Cancelled after its batch was taken
+        task.mark_started()
         
-        logger.debug(f"[{worker_name}] Executing task {task.id}: {task.name}")
+        logger.debug("[%s] Executing task %s: %s", worker_name, task.id, task.name)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Execute the task function
@@ -222,24 +338,27 @@ class BackgroundTaskManager:
             else:
                 result_data = await asyncio.to_thread(task.func, *task.args, **task.kwargs)
             
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.perf_counter() - start_time) * 1000
             
             task.result = TaskResult(
                 success=True,
                 data=result_data,
                 execution_time_ms=elapsed
             )
-            task.status = TaskStatus.COMPLETED
-            task.completed_at = datetime.now()
+            self._finish(task, TaskStatus.COMPLETED)
             task.progress = 100.0
             
-            self.stats.completed_tasks += 1
-            self.stats.total_execution_time_ms += elapsed
+            stats = self.stats
+            stats.completed_tasks += 1
+            stats.total_execution_time_ms += elapsed
             
-            logger.debug(f"[{worker_name}] Task {task.id} completed in {elapsed:.2f}ms")
+            logger.debug("[%s] Task %s completed in %.2fms", worker_name, task.id, elapsed)
+            
+            for ready in self._mark_completed(task.id):
+                await self._requeue(ready)
             
         except Exception as e:
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.perf_counter() - start_time) * 1000
             error_msg = f"{type(e).__name__}: {str(e)}"
             task.error_history.append(error_msg)
             
@@ -248,15 +367,26 @@ class BackgroundTaskManager:
             # Check if we should retry
             if task.retry_count < task.max_retries:
                 task.retry_count += 1
-                task.status = TaskStatus.RETRYING
+                task.set_status(TaskStatus.RETRYING)
                 
-                # Calculate retry delay with exponential backoff
-                delay = task.retry_delay * (task.retry_backoff ** (task.retry_count - 1))
+                # Decorrelated jitter: each delay is drawn between the base
+                # and a multiple of the previous one, so tasks that failed
+                # together spread out instead of retrying in lockstep
+                previous = task.last_retry_delay or task.retry_delay
+                delay = min(
+                    task.retry_delay_cap,
+                    random.uniform(task.retry_delay, previous * task.retry_backoff)
+                )
+                task.last_retry_delay = delay
                 
                 logger.info(f"Retrying task {task.id} in {delay:.1f}s (attempt {task.retry_count}/{task.max_retries})")
                 
                 # Schedule retry
-                asyncio.create_task(self._retry_task(task, delay))
+                heapq.heappush(
+                    self._retry_heap,
+                    (time.monotonic() + delay, next(self._retry_seq), task)
+                )
+                self._retry_wakeup.set()
                 
                 self.stats.retried_tasks += 1
                 
@@ -266,20 +396,84 @@ class BackgroundTaskManager:
                     error=error_msg,
                     execution_time_ms=elapsed
                 )
-                task.status = TaskStatus.FAILED
-                task.completed_at = datetime.now()
+                self._finish(task, TaskStatus.FAILED)
                 
                 self.stats.failed_tasks += 1
+                self._cancel_dependents(task.id)
+    
+    def _finish(self, task: Task, status: TaskStatus) -> None:
+        """Move a task to a terminal status and update the indices"""
+        task.mark_finished(status)
+        self._active.pop(task.id, None)
+        self._finished[task.id] = None
+        event = self._done_events.pop(task.id, None)
+        if event is not None:
+            event.set()
     
-    async def _retry_task(self, task: Task, delay: float) -> None:
-        """Schedule a task for retry after delay"""
-        await asyncio.sleep(delay)
+    def _mark_completed(self, task_id: str) -> List[Task]:
+        """
+        Resolve ``task_id`` in the dependency graph
+
+        Returns the dependents whose last pending dependency this was;
+        the caller queues them.
+        """
+        node = self._dep_graph.pop(task_id, None)
+        if node is None:
+            return []
         
-        if not self._running:
+        ready = []
+        for dependent_id in node.dependents:
+            dependent = self._dep_graph.get(dependent_id)
+            if dependent is None:
+                continue
+            dependent.pending_deps.discard(task_id)
+            if not dependent.pending_deps:
+                task = self._tasks.get(dependent_id)
+                if task is not None and task.status == TaskStatus.PENDING:
+                    ready.append(task)
+        return ready
+    
+    def _cancel_dependents(self, task_id: str) -> None:
+        """Cancel everything downstream of a task that will never complete"""
+        node = self._dep_graph.pop(task_id, None)
+        if node is None:
             return
         
-        task.status = TaskStatus.PENDING
-        await self._queue.put(task)
+        for dependent_id in node.dependents:
+            task = self._tasks.get(dependent_id)
+            if task is not None and task.status == TaskStatus.PENDING:
+                self._finish(task, TaskStatus.CANCELLED)
+                task.error_history.append(f"Dependency {task_id} did not complete")
+                self.stats.cancelled_tasks += 1
+            self._cancel_dependents(dependent_id)
+    
+    async def _retry_scheduler(self) -> None:
+        """Re-queue retrying tasks as their backoff delays expire"""
+        heap = self._retry_heap
+        wakeup = self._retry_wakeup
+        
+        while True:
+            wakeup.clear()
+            if not heap:
+                await wakeup.wait()
+                continue
+            
+            delay = heap[0][0] - time.monotonic()
+            if delay > 0:
+                # Sleep until the earliest retry, or until one is scheduled
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            now = time.monotonic()
+            while heap and heap[0][0] <= now:
+                task = heapq.heappop(heap)[2]
+                if task.status != TaskStatus.RETRYING:
+                    continue  # Cancelled while waiting
+                task.set_status(TaskStatus.PENDING)
+                await self._requeue(task)
     
     async def submit(
         self,
@@ -288,6 +482,7 @@ class BackgroundTaskManager:
         name: Optional[str] = None,
         priority: TaskPriority = TaskPriority.NORMAL,
         max_retries: int = 3,
+        retry_delay_cap: float = 60.0,
         depends_on: Optional[List[str]] = None,
         **kwargs
     ) -> str:
@@ -296,7 +491,7 @@ class BackgroundTaskManager:
         
         Returns: task_id
         """
-        task_id = str(uuid.uuid4())[:8]
+        task_id = f"{self._id_prefix}{next(self._id_counter):x}"
         
         task = Task(
             id=task_id,
@@ -306,16 +501,37 @@ class BackgroundTaskManager:
             kwargs=kwargs,
             priority=priority,
             max_retries=max_retries,
+            retry_delay_cap=retry_delay_cap,
             depends_on=depends_on or []
         )
         
-        async with self._lock:
-            self._tasks[task_id] = task
-            self.stats.total_tasks += 1
+        pending_deps = set()
+        for dep_id in task.depends_on:
+            dep = self._tasks.get(dep_id)
+            if dep is None:
+                raise ValueError(f"Unknown dependency: {dep_id}")
+            if dep.status in (TaskStatus.FAILED, TaskStatus.CANCELLED):
+                raise ValueError(f"Dependency {dep_id} did not complete")
+            if dep.status != TaskStatus.COMPLETED:
+                pending_deps.add(dep_id)
         
-        await self._queue.put(task)
+        self._tasks[task_id] = task
+        self._active[task_id] = None
+        self.stats.total_tasks += 1
         
-        logger.debug(f"Task {task_id} submitted: {task.name}")
+        if pending_deps:
+            # Park in the graph; _mark_completed queues it once ready
+            self._dep_graph[task_id] = DependencyNode(task_id, pending_deps)
+            for dep_id in pending_deps:
+                dep_node = self._dep_graph.get(dep_id)
+                if dep_node is None:
+                    dep_node = self._dep_graph[dep_id] = DependencyNode(dep_id)
+                dep_node.dependents.add(task_id)
+        
+        if not pending_deps:
+            await self._put(task)
+        
+        logger.debug("Task %s submitted: %s", task_id, task.name)
         
         return task_id
     
@@ -323,6 +539,27 @@ class BackgroundTaskManager:
         """Get task by ID"""
         return self._tasks.get(task_id)
     
+    async def wait_for_task(
+        self,
+        task_id: str,
+        timeout: Optional[float] = None
+    ) -> Optional[Task]:
+        """
+        Wait until a task reaches a terminal status
+        
+        Returns the task (check ``status``/``result``), or None for an
+        unknown id. Raises asyncio.TimeoutError if ``timeout`` elapses.
+        """
+        task = self._tasks.get(task_id)
+        if task is None or task_id not in self._active:
+            return task
+        
+        event = self._done_events.get(task_id)
+        if event is None:
+            event = self._done_events[task_id] = asyncio.Event()
+        await asyncio.wait_for(event.wait(), timeout)
+        return task
+    
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get task status"""
         task = self._tasks.get(task_id)
@@ -332,12 +569,12 @@ class BackgroundTaskManager:
         return {
             'id': task.id,
             'name': task.name,
-            'status': task.status.value,
+            'status': task.status_value,
             'progress': task.progress,
             'progress_message': task.progress_message,
-            'created_at': task.created_at.isoformat(),
-            'started_at': task.started_at.isoformat() if task.started_at else None,
-            'completed_at': task.completed_at.isoformat() if task.completed_at else None,
+            'created_at': task.created_at_iso,
+            'started_at': task.started_at_iso,
+            'completed_at': task.completed_at_iso,
             'retry_count': task.retry_count,
             'error_history': task.error_history,
             'result': {
@@ -354,9 +591,9 @@ class BackgroundTaskManager:
             return False
         
         if task.status in [TaskStatus.PENDING, TaskStatus.RETRYING]:
-            task.status = TaskStatus.CANCELLED
-            task.completed_at = datetime.now()
+            self._finish(task, TaskStatus.CANCELLED)
             self.stats.cancelled_tasks += 1
+            self._cancel_dependents(task_id)
             return True
         
         return False
@@ -377,21 +614,17 @@ class BackgroundTaskManager:
         """Get all pending tasks"""
         return [
             await self.get_task_status(task_id)
-            for task_id, task in self._tasks.items()
-            if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING, TaskStatus.RETRYING]
+            for task_id in list(self._active)
         ]
     
     async def get_recent_tasks(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent tasks"""
-        sorted_tasks = sorted(
-            self._tasks.values(),
-            key=lambda t: t.created_at,
-            reverse=True
-        )[:limit]
+        # _tasks is in creation order, so the newest are at the end
+        recent_ids = list(itertools.islice(reversed(self._tasks), limit))
         
         return [
-            await self.get_task_status(t.id)
-            for t in sorted_tasks
+            await self.get_task_status(task_id)
+            for task_id in recent_ids
         ]
     
     def get_stats(self) -> Dict[str, Any]:
@@ -404,25 +637,26 @@ class BackgroundTaskManager:
             'retried_tasks': self.stats.retried_tasks,
             'success_rate': round(self.stats.success_rate * 100, 2),
             'avg_execution_time_ms': round(self.stats.avg_execution_time_ms, 2),
-            'queue_size': self._queue.qsize(),
+            'queue_size': len(self._heap),
             'active_workers': len([w for w in self._workers if not w.done()]),
             'is_running': self._running
         }
     
     async def cleanup_old_tasks(self, max_age_hours: int = 24) -> int:
         """Remove completed tasks older than max_age"""
-        cutoff = datetime.now() - timedelta(hours=max_age_hours)
+        cutoff = time.time() - max_age_hours * 3600
         
-        to_remove = [
-            task_id for task_id, task in self._tasks.items()
-            if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
-            and task.completed_at
-            and task.completed_at < cutoff
-        ]
+        # Finished ids are in completion order: stop at the first
+        # task that is still young enough to keep
+        to_remove = []
+        for task_id in self._finished:
+            if self._tasks[task_id].completed_at >= cutoff:
+                break
+            to_remove.append(task_id)
         
-        async with self._lock:
-            for task_id in to_remove:
-                del self._tasks[task_id]
+        for task_id in to_remove:
+            del self._finished[task_id]
+            del self._tasks[task_id]
         
         if to_remove:
             logger.info(f"Cleaned up {len(to_remove)} old tasks")
@@ -433,7 +667,8 @@ class BackgroundTaskManager:
 def background_task(
     priority: TaskPriority = TaskPriority.NORMAL,
     max_retries: int = 3,
-    name: Optional[str] = None
+    name: Optional[str] = None,
+    retry_delay_cap: float = 60.0
 ):
     """
     Decorator to mark a function as a background task
@@ -452,6 +687,7 @@ def background_task(
                 name=name or func.__name__,
                 priority=priority,
                 max_retries=max_retries,
+                retry_delay_cap=retry_delay_cap,
                 **kwargs
             )
         
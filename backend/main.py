@@ -1,24 +1,37 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request, Header, Body, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request, Header, Body, Form, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import uvicorn
 import asyncio
 import os
+import sys
+import signal
 import json
+import hashlib
 import re
 from dotenv import load_dotenv
 import logging
 from contextlib import asynccontextmanager
-from cachetools import TTLCache
 import time
+import functools
+
+try:
+    from ciso8601 import parse_datetime as _ciso_parse_datetime  # Optional: C ISO 8601 parser
+except ImportError:
+    _ciso_parse_datetime = None
+
+try:
+    import redis.asyncio as aioredis  # Optional: shared rate limit counters
+except ImportError:
+    aioredis = None
 
 from services.resume_parser import ResumeParser
 from services.matching_engine import MatchingEngine
 from services.email_parser import EmailParser
-from services.microsoft_graph import MicrosoftGraphService
+from services.microsoft_graph import MicrosoftGraphService, close_http_session
 from services.token_storage import get_token_storage
 from services.openai_service import get_openai_service
 from services.local_ai_service import get_local_ai_service
@@ -28,6 +41,7 @@ from services.oauth_automation_service import get_oauth_automation, OAuthAutomat
 from services.auth_service import get_auth_service
 from models.candidate import Candidate, JobDescription, MatchResult
 from core.config import get_settings
+from core.middleware import metrics_collector
 
 # Advanced AI services
 from api.advanced_routes import router as advanced_router
@@ -64,11 +78,18 @@ _settings = get_settings()
 
 # Configuration - use centralized config with env var overrides
 DEBUG = _settings.debug
-AI_TIMEOUT = float(os.getenv('AI_TIMEOUT_SECONDS', str(_settings.ai_timeout)))
-AI_ANALYSIS_TIMEOUT = float(os.getenv('AI_ANALYSIS_TIMEOUT', '180'))  # LLM inference needs time on CPU
+AI_TIMEOUT = _settings.ai_timeout
+AI_ANALYSIS_TIMEOUT = _settings.ai_analysis_timeout  # LLM inference needs time on CPU
 MAX_CONCURRENT_REQUESTS = _settings.max_concurrent_requests
 USE_OPENAI_FALLBACK = os.getenv('USE_OPENAI_FALLBACK', 'false').lower() == 'true'  # Disabled by default
 
+# Email auto-sync configuration - loaded once with the rest of the settings
+_MS_CLIENT_ID = _settings.microsoft_client_id
+_MS_CLIENT_SECRET = _settings.microsoft_client_secret
+_MS_TENANT_ID = _settings.microsoft_tenant_id
+_SYNC_PRIMARY_EMAIL = _settings.email_address
+SYNC_INTERVAL_SECONDS = _settings.sync_interval_minutes * 60
+
 # Configure logging with structured format
 logging.basicConfig(
     level=logging.INFO if DEBUG else logging.WARNING,
@@ -76,19 +97,143 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Performance: Response cache (5 minutes TTL)
-response_cache = TTLCache(maxsize=1000, ttl=300)
+# Performance: Response cache (default 5 minutes TTL, overridable per route)
+# Plain dict of key -> (expires_at, value) with lazy expiry on read. It is only
+# touched from the event loop, so unlike cachetools.TTLCache it needs no lock.
+# Hits move the entry to the end, so dict order is least-recently-used first
+# and the first key is always the one to evict.
+RESPONSE_CACHE_MAXSIZE = _settings.cache_max_size
+RESPONSE_CACHE_TTL = _settings.cache_ttl_seconds
+response_cache: Dict[str, Tuple[float, Any]] = {}
+response_cache_stats = {'hits': 0, 'misses': 0}
+
+def cache_get(key: str) -> Any:
+    """Return the cached value for key, or None if missing or expired"""
+    entry = response_cache.pop(key, None)
+    if entry is None or entry[0] <= time.monotonic():
+        response_cache_stats['misses'] += 1
+        return None
+    response_cache[key] = entry
+    response_cache_stats['hits'] += 1
+    return entry[1]
+
+def cache_set(key: str, value: Any, ttl: float = RESPONSE_CACHE_TTL) -> None:
+    """Cache value under key for ttl seconds, evicting the least recently used entry when full"""
+    response_cache.pop(key, None)
+    if len(response_cache) >= RESPONSE_CACHE_MAXSIZE:
+        del response_cache[next(iter(response_cache))]
+    response_cache[key] = (time.monotonic() + ttl, value)
+
+def cached_response(ttl: float = RESPONSE_CACHE_TTL):
+    """Cache an endpoint's return value for ttl seconds, keyed by route and its arguments"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            key = f"{fn.__name__}:{sorted(kwargs.items())}"
+            result = cache_get(key)
+            if result is None:
+                result = await fn(**kwargs)
+                cache_set(key, result, ttl)
+            return result
+        return wrapper
+    return decorator
+
+# Email sync: AI analysis results keyed by a hash of the analysed text, so a
+# forwarded or re-submitted resume is not scored again (same expiry scheme as above)
+AI_ANALYSIS_CACHE_MAXSIZE = 500
+AI_ANALYSIS_CACHE_TTL = 24 * 3600
+ai_analysis_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
 
-# Performance: Semaphore for connection pooling
-db_semaphore = asyncio.Semaphore(50)  # Max 50 concurrent DB operations
+# Email sync: separate limits for I/O (Graph/IMAP/DB) and CPU-bound AI analysis,
+# so network fan-out can stay wide without the local LLM thrashing the CPU
+io_semaphore = asyncio.Semaphore(20)
+cpu_semaphore = asyncio.Semaphore(max(1, (os.cpu_count() or 2) // 2))
 
 # Background email sync task
 background_sync_task = None
+sync_shutdown_event = asyncio.Event()  # Set on shutdown to stop auto_sync_emails between passes
 oauth_automation_service: OAuthAutomationService = None
 
 # Track last sync timestamp for incremental fetching
 _last_email_sync_time: str = None
 
+# Mail that can never be a candidate: bounces, auto-replies and calendar responses.
+# Deliberately narrow - portal notifications (Indeed/LinkedIn no-reply senders,
+# footers with "unsubscribe") carry real applicants and must still be parsed.
+_SKIP_SENDER_RE = re.compile(r'^(mailer-daemon|postmaster)@', re.IGNORECASE)
+_SKIP_SUBJECT_RE = re.compile(
+    r'^\s*(automatic reply|auto[- ]?reply|out of (the )?office|undeliverable|'
+    r'delivery status notification|accepted|declined|tentative|canceled|cancelled|'
+    r'(updated )?invitation):',
+    re.IGNORECASE
+)
+
+def _is_non_candidate_mail(sender_email: str, subject: str) -> bool:
+    """Cheap pre-check so obvious system mail skips extraction and AI analysis"""
+    return bool(_SKIP_SENDER_RE.match(sender_email) or _SKIP_SUBJECT_RE.match(subject))
+
+def _claim_ai_analysis(claims: Dict[str, float], email_key: str, received_ts: float) -> bool:
+    """
+    Claim AI analysis of a candidate for the message received at received_ts.
+    Messages finish out of order, so a newer message takes the claim over from an
+    older one; the older one then skips its write (see callers).
+    """
+    current = claims.get(email_key)
+    if current is not None and current >= received_ts:
+        return False
+    claims[email_key] = received_ts
+    return True
+
+def _parse_graph_datetime(value: str) -> datetime:
+    """Parse a Graph ISO 8601 timestamp (e.g. receivedDateTime, with 'Z' suffix)"""
+    if _ciso_parse_datetime is not None:
+        return _ciso_parse_datetime(value)
+    # Graph always uses a trailing 'Z'; only that suffix needs rewriting
+    if value[-1] == 'Z':
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+async def _spawn_bounded(tg: asyncio.TaskGroup, sem: asyncio.Semaphore, fn, *args) -> None:
+    """
+    Wait for a free slot in sem, then start fn(*args) in tg.
+    The slot is released as soon as that task finishes, so the next item starts
+    immediately instead of waiting for a whole batch to drain.
+    """
+    await sem.acquire()
+    task = tg.create_task(fn(*args))
+    task.add_done_callback(lambda _: sem.release())
+
+async def _sleep_until_shutdown(delay: float) -> bool:
+    """Sleep for delay seconds, returning True early if shutdown was requested"""
+    try:
+        await asyncio.wait_for(sync_shutdown_event.wait(), timeout=delay)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+async def _analyze_candidate_cached(analysis_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Run ai_service.analyze_candidate on analysis_text, reusing the result for identical text.
+    Cache hits skip the CPU slot and the timeout entirely; only scored results are cached.
+    """
+    key = hashlib.blake2b(analysis_text.encode('utf-8', 'ignore'), digest_size=16).hexdigest()
+    entry = ai_analysis_cache.get(key)
+    if entry is not None:
+        if entry[0] > time.monotonic():
+            return entry[1]
+        ai_analysis_cache.pop(key, None)
+    
+    # Deadline starts once the CPU slot is held
+    async with cpu_semaphore, asyncio.timeout(AI_ANALYSIS_TIMEOUT):
+        ai_analysis = await ai_service.analyze_candidate(analysis_text)
+    
+    if ai_analysis and ai_analysis.get('quality_score'):
+        ai_analysis_cache.pop(key, None)
+        if len(ai_analysis_cache) >= AI_ANALYSIS_CACHE_MAXSIZE:
+            del ai_analysis_cache[next(iter(ai_analysis_cache))]
+        ai_analysis_cache[key] = (time.monotonic() + AI_ANALYSIS_CACHE_TTL, ai_analysis)
+    return ai_analysis
+
 async def auto_sync_emails():
     """
     FULLY AUTOMATED email sync with OAuth2 Client Credentials Flow
@@ -104,17 +249,22 @@ async def auto_sync_emails():
     """
     global _last_email_sync_time
     # Wait 5 seconds before first sync to allow server to fully start
-    await asyncio.sleep(5)
+    if await _sleep_until_shutdown(5):
+        return
+    
+    # One client for the lifetime of the loop; its HTTP session is the process-wide one
+    graph_service = MicrosoftGraphService(_MS_CLIENT_ID, _MS_CLIENT_SECRET, _MS_TENANT_ID, user_email=_SYNC_PRIMARY_EMAIL)
     
-    while True:
+    consecutive_errors = 0
+    while not sync_shutdown_event.is_set():
         try:
             logger.info("🔄 Auto-sync: Starting email sync...")
             
             # Get OAuth2 configuration
-            client_id = os.getenv('MICROSOFT_CLIENT_ID')
-            client_secret = os.getenv('MICROSOFT_CLIENT_SECRET')
-            tenant_id = os.getenv('MICROSOFT_TENANT_ID')
-            primary_email = os.getenv('EMAIL_ADDRESS')
+            client_id = _MS_CLIENT_ID
+            client_secret = _MS_CLIENT_SECRET
+            tenant_id = _MS_TENANT_ID
+            primary_email = _SYNC_PRIMARY_EMAIL
             
             oauth2_success = False
             
@@ -122,7 +272,6 @@ async def auto_sync_emails():
                 try:
                     token_storage = get_token_storage()
                     token_data = token_storage.get_token(primary_email)
-                    graph_service = MicrosoftGraphService(client_id, client_secret, tenant_id, user_email=primary_email)
                     
                     # PRIORITY 1: Try Client Credentials Flow (FULLY AUTOMATIC - no user interaction)
                     # This uses Application Permissions configured in Azure AD
@@ -191,9 +340,7 @@ async def auto_sync_emails():
                         graph_service.token_expiry = token_data.get('expires_at_dt', datetime.now() + timedelta(hours=1))
                         
                         # Check if database is empty - if empty, fetch ALL emails
-                        candidate_count = await asyncio.to_thread(
-                            lambda: db_service.get_total_candidates()
-                        )
+                        candidate_count = await db_service.get_total_candidates_async()
                         is_first_sync = (candidate_count == 0 and _last_email_sync_time is None)
                         
                         # Build incremental filter for Graph API
@@ -207,29 +354,34 @@ async def auto_sync_emails():
                         # Record sync start time (ISO 8601 format for Graph API)
                         sync_start_time = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
                         
-                        # Fetch emails - incremental when possible
-                        fetch_top = 100000 if is_first_sync else 500
-                        result = await graph_service.get_messages(
-                            folder='inbox', 
-                            top=fetch_top,
-                            fetch_all=is_first_sync,
-                            filter_query=filter_query
+                        # Stream emails page by page - incremental when possible
+                        message_pages = graph_service.iter_messages(
+                            folder='inbox',
+                            filter_query=filter_query,
+                            limit=None if is_first_sync else 500
                         )
+                        # Fetch the first page up front so request errors are handled below
+                        try:
+                            first_page = await anext(message_pages, [])
+                            result = {'status': 'success'}
+                        except Exception as fetch_error:
+                            result = {'status': 'error', 'message': str(fetch_error)}
                     
                         if result['status'] == 'success':
-                            messages = result['messages']
-                            logger.info(f"📧 Found {len(messages)} emails from OAuth2")
-                            
                             # Process messages in parallel batches
                             new_count = 0
+                            # Candidate email -> receivedDateTime of the message claiming its AI analysis this pass
+                            ai_claims: Dict[str, float] = {}
                             
-                            async def process_graph_message(msg):
+                            async def process_graph_message(msg, prefetched_attachments):
                                 nonlocal new_count
                                 try:
                                     # Convert Graph API message to candidate format
                                     sender = msg.get('from', {}).get('emailAddress', {})
                                     sender_email = sender.get('address', '')
-                                    sender_name = sender.get('name', sender_email.split('@')[0])
+                                    sender_name = sender.get('name')
+                                    if sender_name is None:
+                                        sender_name = sender_email.split('@', 1)[0]
                                     
                                     subject = msg.get('subject', '')
                                     body = msg.get('body', {}).get('content', '')
@@ -239,16 +391,20 @@ async def auto_sync_emails():
                                     attachments = []
                                     
                                     if has_attachments:
-                                        # Fetch attachments
-                                        attach_result = await graph_service.get_message_with_attachments(msg['id'])
-                                        if attach_result['status'] == 'success':
-                                            attachments = attach_result['attachments']
+                                        # Use the $batch prefetch; fetch individually only if its sub-request failed
+                                        attachments = prefetched_attachments.get(msg['id'])
+                                        if attachments is None:
+                                            attachments = []
+                                            async with io_semaphore:
+                                                attach_result = await graph_service.get_message_with_attachments(msg['id'])
+                                            if attach_result['status'] == 'success':
+                                                attachments = attach_result['attachments']
                                     
                                     # Build email data - use actual email received date
                                     received_dt = msg.get('receivedDateTime')
                                     if received_dt:
                                         try:
-                                            received_date = datetime.fromisoformat(received_dt.replace('Z', '+00:00'))
+                                            received_date = _parse_graph_datetime(received_dt)
                                         except Exception:
                                             received_date = datetime.now()
                                     else:
@@ -268,28 +424,36 @@ async def auto_sync_emails():
                                     if not candidate or not candidate.get('email'):
                                         return
                                     
-                                    # Check if exists
-                                    existing = await asyncio.to_thread(db_service.get_candidate_by_email, candidate['email'])
+                                    # AI processing - use resume text OR email summary
+                                    analysis_text = candidate.get('resume_text') or candidate.get('summary', '')
+                                    # Store resume text for future AI chat access
+                                    if analysis_text:
+                                        candidate['resume_text'] = analysis_text[:10000]
+                                    
+                                    # Save (or refresh) the row and learn whether it still needs AI in one round-trip
+                                    async with io_semaphore:
+                                        stored = await db_service.upsert_candidate_async(candidate)
+                                    candidate['id'] = stored['id']
                                     
                                     needs_ai = False
-                                    if not existing:
+                                    if stored['is_new']:
                                         needs_ai = True
                                         new_count += 1
-                                    elif not existing.get('ai_analysis') and existing.get('matchScore', 0) <= 0:
+                                    elif not stored['has_ai_analysis'] and stored['matchScore'] <= 0:
                                         needs_ai = True
                                     
-                                    # AI processing - use resume text OR email summary
-                                    analysis_text = candidate.get('resume_text') or candidate.get('summary', '')
-                                    # Store resume text for future AI chat access
-                                    if analysis_text:
-                                        candidate['resume_text'] = analysis_text[:10000]
+                                    if not (analysis_text and len(analysis_text) > 20):
+                                        needs_ai = False
                                     
-                                    if needs_ai and analysis_text and len(analysis_text) > 20:
+                                    # Several messages from one candidate: only the newest one with usable text is analysed
+                                    email_key = candidate['email'].lower()
+                                    received_ts = received_date.timestamp()
+                                    if needs_ai:
+                                        needs_ai = _claim_ai_analysis(ai_claims, email_key, received_ts)
+                                    
+                                    if needs_ai:
                                         try:
-                                            ai_analysis = await asyncio.wait_for(
-                                                ai_service.analyze_candidate(analysis_text),
-                                                timeout=AI_ANALYSIS_TIMEOUT
-                                            )
+                                            ai_analysis = await _analyze_candidate_cached(analysis_text)
                                             if ai_analysis and ai_analysis.get('quality_score'):
                                                 # Map quality_score to matchScore for database
                                                 candidate.update({
@@ -314,43 +478,65 @@ async def auto_sync_emails():
                                             logger.warning(f"AI analysis failed: {str(ai_err)[:100]}")
                                             candidate['matchScore'] = 45
                                     
-                                    # Save to database
-                                    if existing:
-                                        await asyncio.to_thread(db_service.update_candidate, candidate)
-                                    else:
-                                        await asyncio.to_thread(db_service.insert_candidate, candidate)
-                                    
-                                    # Save AI analysis if we got one
-                                    if needs_ai and analysis_text and len(analysis_text) > 20:
+                                    # Save AI fields and analysis if we ran it and no newer message took over meanwhile
+                                    if needs_ai and ai_claims.get(email_key) == received_ts:
                                         try:
-                                            await asyncio.to_thread(
-                                                db_service.save_ai_analysis,
-                                                candidate.get('id', ''),
-                                                {
-                                                    'score': candidate.get('matchScore', 50),
-                                                    'job_category': candidate.get('job_category', 'General'),
-                                                    'summary': candidate.get('summary', ''),
-                                                    'skills': candidate.get('skills', []),
-                                                    'experience': candidate.get('experience', 0),
-                                                    'analyzed_at': datetime.now().isoformat(),
-                                                }
-                                            )
+                                            async with io_semaphore:
+                                                await db_service.update_ai_fields_async(
+                                                    candidate,
+                                                    {
+                                                        'score': candidate.get('matchScore', 50),
+                                                        'job_category': candidate.get('job_category', 'General'),
+                                                        'summary': candidate.get('summary', ''),
+                                                        'skills': candidate.get('skills', []),
+                                                        'experience': candidate.get('experience', 0),
+                                                        'analyzed_at': datetime.now().isoformat(),
+                                                    }
+                                                )
                                         except Exception:
                                             pass
                                         
                                 except Exception as e:
                                     logger.warning(f"Error processing message: {str(e)[:100]}")
                             
-                            # Process in batches (smaller batch for SQLite safety)
-                            BATCH_SIZE = 3
-                            for i in range(0, len(messages), BATCH_SIZE):
-                                batch = messages[i:i+BATCH_SIZE]
-                                await asyncio.gather(*[process_graph_message(msg) for msg in batch], return_exceptions=True)
-                                
-                                if len(messages) > 50 and (i + BATCH_SIZE) % 50 == 0:
-                                    logger.info(f"📊 Progress: {min(i+BATCH_SIZE, len(messages))}/{len(messages)} emails processed...")
+                            # Keep a fixed number of messages in flight (small for SQLite safety)
+                            CONCURRENCY = 3
+                            PREFETCH_SIZE = MicrosoftGraphService.BATCH_MAX_REQUESTS
+                            sem = asyncio.Semaphore(CONCURRENCY)
+                            total_messages = 0
+                            skipped_messages = 0
+                            async with asyncio.TaskGroup() as tg:
+                                page = first_page
+                                while page:
+                                    fetched = len(page)
+                                    page = [
+                                        msg for msg in page
+                                        if not _is_non_candidate_mail(
+                                            msg.get('from', {}).get('emailAddress', {}).get('address', ''),
+                                            msg.get('subject') or ''
+                                        )
+                                    ]
+                                    skipped_messages += fetched - len(page)
+                                    
+                                    for w in range(0, len(page), PREFETCH_SIZE):
+                                        window = page[w:w+PREFETCH_SIZE]
+                                        # One $batch round-trip for every attachment listing in this window;
+                                        # it overlaps with the tail of the previous window still running
+                                        async with io_semaphore:
+                                            prefetched_attachments = await graph_service.batch_get_attachments(
+                                                [msg['id'] for msg in window if msg.get('hasAttachments')]
+                                            )
+                                        
+                                        for msg in window:
+                                            await _spawn_bounded(tg, sem, process_graph_message, msg, prefetched_attachments)
+                                    
+                                    total_messages += fetched
+                                    if total_messages > 50:
+                                        logger.info(f"📊 Progress: {total_messages} emails dispatched...")
+                                    # Next page is requested only now, while this one is still being processed
+                                    page = await anext(message_pages, None)
                             
-                            logger.info(f"✅ OAuth2 sync: {primary_email} - {len(messages)} emails, {new_count} new candidates")
+                            logger.info(f"✅ OAuth2 sync: {primary_email} - {total_messages} emails ({skipped_messages} system mails skipped), {new_count} new candidates")
                             oauth2_success = True
                             # Update last sync time on success
                             _last_email_sync_time = sync_start_time
@@ -409,9 +595,7 @@ async def auto_sync_emails():
                             continue
                         
                         # Check if database is empty - if so, process ALL emails initially
-                        candidate_count = await asyncio.to_thread(
-                            lambda: db_service.get_total_candidates()
-                        )
+                        candidate_count = await db_service.get_total_candidates_async()
                         process_all = (candidate_count == 0)
                         
                         if process_all:
@@ -423,83 +607,94 @@ async def auto_sync_emails():
                             timeout=600  # 10 minute max for fetching large inboxes
                         )
                         new_count = 0
+                        # Candidate email -> received date of the message claiming its AI analysis
+                        ai_claims: Dict[str, float] = {}
                         
                         # PARALLEL PROCESSING - Process candidates in batches of 10 concurrently
                         async def process_single_candidate(email_data):
                             nonlocal new_count
+                            if _is_non_candidate_mail(email_data.get('sender_email', ''), email_data.get('subject', '')):
+                                return
                             try:
                                 candidate = await scraper_service.extract_candidate_from_email(email_data)
                                 if not candidate or not candidate.get('email'):
                                     return
                                 
-                                # Check if candidate already exists
-                                existing = await asyncio.to_thread(db_service.get_candidate_by_email, candidate['email'])
+                                # Use resume text OR summary for analysis
+                                analysis_text = candidate.get('resume_text', '') or candidate.get('summary', '')
+                                # Store resume text for future AI chat access
+                                if analysis_text:
+                                    candidate['resume_text'] = analysis_text[:10000]
+                                
+                                # Save (or refresh) the row and learn whether it still needs AI in one round-trip
+                                async with io_semaphore:
+                                    stored = await db_service.upsert_candidate_async(candidate)
+                                candidate['id'] = stored['id']
                                 
                                 # Only process with AI if NEW or needs update
                                 needs_ai_processing = False
-                                if not existing:
+                                if stored['is_new']:
                                     needs_ai_processing = True
                                     new_count += 1
-                                elif not existing.get('ai_analysis') or not existing.get('job_category') or existing.get('job_category') == 'General':
+                                elif not stored['has_ai_analysis'] or stored['job_category'] == 'General':
                                     # Existing candidate without AI analysis
                                     needs_ai_processing = True
                                 
+                                if not (analysis_text and len(analysis_text) > 20):
+                                    needs_ai_processing = False
+                                
+                                # Several emails from one candidate: only the newest one with usable text is analysed
+                                email_key = candidate['email'].lower()
+                                received_ts = email_data['received_date'].timestamp()
+                                if needs_ai_processing:
+                                    needs_ai_processing = _claim_ai_analysis(ai_claims, email_key, received_ts)
+                                
                                 # AI Processing only for new/unprocessed candidates
                                 if needs_ai_processing:
                                     try:
-                                        # Use resume text OR summary for analysis
-                                        analysis_text = candidate.get('resume_text', '') or candidate.get('summary', '')
-                                        # Store resume text for future AI chat access
-                                        if analysis_text:
-                                            candidate['resume_text'] = analysis_text[:10000]
-                                        
-                                        if analysis_text and len(analysis_text) > 20:
-                                            ai_analysis = await asyncio.wait_for(
-                                                ai_service.analyze_candidate(analysis_text),
-                                                timeout=AI_ANALYSIS_TIMEOUT
-                                            )
-                                            if ai_analysis and ai_analysis.get('quality_score'):
-                                                # Map quality_score to matchScore for database
-                                                score = ai_analysis.get('quality_score', 50)
-                                                candidate.update({
-                                                    'job_category': ai_analysis.get('job_category', 'General'),
-                                                    'matchScore': score,
-                                                    'summary': ai_analysis.get('summary', candidate.get('summary', '')),
-                                                    'skills': ai_analysis.get('skills', candidate.get('skills', [])),
-                                                    'experience': ai_analysis.get('experience', candidate.get('experience', 0)),
-                                                    'education': ai_analysis.get('education', []),
-                                                    'phone': ai_analysis.get('phone') or candidate.get('phone', ''),
-                                                    'location': ai_analysis.get('location') or candidate.get('location', ''),
-                                                    'linkedin': ai_analysis.get('linkedin') or candidate.get('linkedin', ''),
-                                                    'certifications': ai_analysis.get('certifications', []),
-                                                    'languages': ai_analysis.get('languages', []),
-                                                    'status': 'Strong' if score >= 70 else ('Partial' if score >= 40 else 'Reject'),
-                                                })
-                                                logger.info(f"✅ AI scored {candidate.get('name')}: {score}%")
+                                        ai_analysis = await _analyze_candidate_cached(analysis_text)
+                                        if ai_analysis and ai_analysis.get('quality_score'):
+                                            # Map quality_score to matchScore for database
+                                            score = ai_analysis.get('quality_score', 50)
+                                            candidate.update({
+                                                'job_category': ai_analysis.get('job_category', 'General'),
+                                                'matchScore': score,
+                                                'summary': ai_analysis.get('summary', candidate.get('summary', '')),
+                                                'skills': ai_analysis.get('skills', candidate.get('skills', [])),
+                                                'experience': ai_analysis.get('experience', candidate.get('experience', 0)),
+                                                'education': ai_analysis.get('education', []),
+                                                'phone': ai_analysis.get('phone') or candidate.get('phone', ''),
+                                                'location': ai_analysis.get('location') or candidate.get('location', ''),
+                                                'linkedin': ai_analysis.get('linkedin') or candidate.get('linkedin', ''),
+                                                'certifications': ai_analysis.get('certifications', []),
+                                                'languages': ai_analysis.get('languages', []),
+                                                'status': 'Strong' if score >= 70 else ('Partial' if score >= 40 else 'Reject'),
+                                            })
+                                            logger.info(f"✅ AI scored {candidate.get('name')}: {score}%")
                                     except asyncio.TimeoutError:
                                         logger.warning(f"AI timeout for {candidate.get('name')} - using default score")
                                         candidate['matchScore'] = 45
                                     except Exception as ai_err:
                                         logger.warning(f"AI error: {str(ai_err)}")
                                         candidate['matchScore'] = 45
-                                
-                                # Save to database
-                                if existing:
-                                    await asyncio.to_thread(db_service.update_candidate, candidate)
-                                else:
-                                    await asyncio.to_thread(db_service.insert_candidate, candidate)
+                                    
+                                    # Save AI-derived fields unless a newer email took over meanwhile
+                                    if ai_claims.get(email_key) == received_ts:
+                                        async with io_semaphore:
+                                            await db_service.update_ai_fields_async(candidate)
                             except Exception as e:
                                 logger.warning(f"Error processing candidate: {str(e)[:100]}")
                         
-                        # Process in batches of 10 for optimal performance
-                        BATCH_SIZE = 10
-                        for i in range(0, len(emails), BATCH_SIZE):
-                            batch = emails[i:i+BATCH_SIZE]
-                            await asyncio.gather(*[process_single_candidate(email_data) for email_data in batch], return_exceptions=True)
-                            
-                            # Log progress for large syncs
-                            if len(emails) > 50 and (i + BATCH_SIZE) % 50 == 0:
-                                logger.info(f"📊 Progress: {min(i+BATCH_SIZE, len(emails))}/{len(emails)} emails processed...")
+                        # Keep 10 candidates in flight continuously
+                        CONCURRENCY = 10
+                        sem = asyncio.Semaphore(CONCURRENCY)
+                        async with asyncio.TaskGroup() as tg:
+                            for i, email_data in enumerate(emails, 1):
+                                await _spawn_bounded(tg, sem, process_single_candidate, email_data)
+                                
+                                # Log progress for large syncs
+                                if len(emails) > 50 and i % 50 == 0:
+                                    logger.info(f"📊 Progress: {i}/{len(emails)} emails dispatched...")
                         
                         mail.logout()
                         logger.info(f"✅ Auto-sync: {account.name} - {len(emails)} emails, {new_count} new candidates")
@@ -508,13 +703,42 @@ async def auto_sync_emails():
                         logger.error(f"Auto-sync error for {account.name}: {str(e)}")
             
             # Wait for next sync - default 2 minutes for near-real-time new email detection
-            sync_interval = int(os.getenv('SYNC_INTERVAL_MINUTES', '2')) * 60
-            logger.info(f"⏰ Auto-sync: Next sync in {sync_interval//60} minutes")
-            await asyncio.sleep(sync_interval)
+            consecutive_errors = 0
+            delay = SYNC_INTERVAL_SECONDS
+            logger.info(f"⏰ Auto-sync: Next sync in {delay//60} minutes")
             
         except Exception as e:
-            logger.error(f"Auto-sync background task error: {str(e)}")
-            await asyncio.sleep(60)
+            # Back off exponentially on repeated failures, never beyond the normal interval
+            consecutive_errors += 1
+            delay = min(60 * 2 ** (consecutive_errors - 1), SYNC_INTERVAL_SECONDS)
+            logger.error(f"Auto-sync background task error ({consecutive_errors} in a row, retrying in {delay}s): {str(e)}")
+        
+        if await _sleep_until_shutdown(delay):
+            break
+    
+    logger.info("🛑 Auto-sync stopped")
+
+async def run_sync_worker():
+    """
+    Run auto_sync_emails as a standalone process (python main.py --sync-worker).
+    With SYNC_WORKER_MODE=true the API processes skip the sync loop, so AI scoring and
+    bulk inserts no longer compete with request handling and gunicorn workers don't
+    each run their own copy of the sync.
+    """
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, sync_shutdown_event.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still interrupts asyncio.run
+    
+    logger.info(f"🔄 Sync worker: started (every {_settings.sync_interval_minutes} minutes)")
+    await db_service.init_async_pool(max_connections=_settings.db_pool_size)
+    try:
+        await auto_sync_emails()
+    finally:
+        await db_service.close_async_pool()
+        close_http_session()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -544,6 +768,12 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️ LLM initialization skipped: {e}")
     
     logger.info(f"📧 Email Accounts: {len(scraper_service.email_accounts)} configured")
+    
+    # Warm the aiosqlite pool used by the email sync path
+    try:
+        await db_service.init_async_pool(max_connections=_settings.db_pool_size)
+    except Exception as e:
+        logger.warning(f"⚠️ Async DB pool initialization failed: {e}")
     logger.info(f"⚡ Max Concurrent Requests: {MAX_CONCURRENT_REQUESTS}")
     
     # Initialize OAuth Automation Service
@@ -580,25 +810,33 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"⚠️ OAuth2 background init error: {e}")
     
+    # Every task started here is kept so shutdown can cancel and await it
+    background_tasks: List[asyncio.Task] = []
+    app.state.background_tasks = background_tasks
+    
     # Launch OAuth init as background task — don't block server startup
-    asyncio.create_task(_init_oauth_background())
+    background_tasks.append(asyncio.create_task(_init_oauth_background()))
     
     # Auto-sync enabled? - Use new OAuth automation
-    auto_sync_enabled = os.getenv('AUTO_SYNC_ENABLED', 'true').lower() == 'true'
+    auto_sync_enabled = _settings.auto_sync_enabled
     has_email_accounts = len(scraper_service.email_accounts) > 0
     
     if auto_sync_enabled and (has_email_accounts or oauth_automation_service.is_configured):
-        logger.info(f"🔄 Auto-sync: ENABLED (every {os.getenv('SYNC_INTERVAL_MINUTES', '15')} minutes)")
+        logger.info(f"🔄 Auto-sync: ENABLED (every {_settings.sync_interval_minutes} minutes)")
         
         # Start OAuth automation service in background (handles token refresh and scheduling)
-        asyncio.create_task(oauth_automation_service.start())
+        background_tasks.append(asyncio.create_task(oauth_automation_service.start()))
         logger.info("🔐 OAuth Automation Service: Starting in background")
         
-        # Also start legacy auto-sync for IMAP fallback
-        try:
-            background_sync_task = asyncio.create_task(auto_sync_emails())
-        except Exception as e:
-            logger.error(f"Failed to start auto-sync: {str(e)}")
+        # Also start legacy auto-sync for IMAP fallback - unless a separate worker process owns it
+        if _settings.sync_worker_mode:
+            logger.info("🔄 Auto-sync: delegated to worker process (python main.py --sync-worker)")
+        else:
+            try:
+                background_sync_task = asyncio.create_task(auto_sync_emails())
+                background_tasks.append(background_sync_task)
+            except Exception as e:
+                logger.error(f"Failed to start auto-sync: {str(e)}")
     else:
         logger.info("🔄 Auto-sync: DISABLED (no email accounts or OAuth configured)")
     
@@ -615,7 +853,7 @@ async def lifespan(app: FastAPI):
         logger.info("📬 Advanced services initialized (ML, Analytics, Campaigns, SMS)")
         
         # Start campaign processor background task
-        campaign_task = asyncio.create_task(run_campaign_processor(interval_seconds=300))
+        background_tasks.append(asyncio.create_task(run_campaign_processor(interval_seconds=300)))
         logger.info("📬 Campaign processor started (checks every 5 minutes)")
     except Exception as e:
         logger.warning(f"⚠️ Advanced services initialization warning: {str(e)}")
@@ -629,8 +867,93 @@ async def lifespan(app: FastAPI):
     if oauth_automation_service:
         await oauth_automation_service.stop()
     if background_sync_task:
-        background_sync_task.cancel()
-    response_cache.clear()
+        # Wake the sync loop out of its sleep; cancel it if a pass is still running
+        sync_shutdown_event.set()
+        try:
+            await asyncio.wait_for(background_sync_task, timeout=10)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            logger.info("🛑 Auto-sync cancelled mid-pass")
+    # Cancel whatever is still running and wait for it to unwind before closing the pools
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await metrics_collector.close()
+    await db_service.close_async_pool()
+    close_http_session()
+    if _rate_limit_redis is not None:
+        await _rate_limit_redis.aclose()
+
+# Rate limiting: fixed window of rate_limit_requests per rate_limit_window seconds per client IP.
+# With REDIS_URL set the counters live in Redis (shared by all workers, one round-trip per
+# request); otherwise each process keeps its own counters for the current window.
+# Behind a reverse proxy the client IP comes from its forwarding headers, but only when the
+# connection itself is from one of TRUSTED_PROXIES - anyone else could forge them.
+_RATE_LIMIT_LUA = """
+local n = redis.call('INCR', KEYS[1])
+if n == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return n
+"""
+_rate_limit_redis = aioredis.from_url(_settings.redis_url) if aioredis is not None and _settings.redis_url else None
+_rate_limit_incr = _rate_limit_redis.register_script(_RATE_LIMIT_LUA) if _rate_limit_redis is not None else None
+_local_rate_window = 0
+_local_rate_counts: Dict[str, int] = {}
+_TRUSTED_PROXIES = frozenset(ip.strip() for ip in _settings.trusted_proxies.split(',') if ip.strip())
+_TRUST_ANY_PROXY = '*' in _TRUSTED_PROXIES
+# Liveness probes must never be throttled
+_RATE_LIMIT_EXEMPT_PATHS = frozenset({'/health'})
+
+def _client_ip(request: Request) -> str:
+    """Client address for rate limiting, resolved through trusted reverse proxies"""
+    peer = request.client.host if request.client else 'unknown'
+    if not (_TRUST_ANY_PROXY or peer in _TRUSTED_PROXIES):
+        return peer
+    
+    forwarded = request.headers.get('x-forwarded-for')
+    if forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            if _TRUST_ANY_PROXY:
+                return hops[0]
+            # Each trusted proxy appends the address it saw; the rightmost untrusted one is the client
+            for hop in reversed(hops):
+                if hop not in _TRUSTED_PROXIES:
+                    return hop
+            return hops[0]
+    
+    real_ip = request.headers.get('x-real-ip')
+    return real_ip.strip() if real_ip else peer
+
+async def rate_limit_check(request: Request):
+    """Reject the request with 429 once its client IP exceeds the per-window limit"""
+    global _local_rate_window, _local_rate_counts
+    if request.url.path in _RATE_LIMIT_EXEMPT_PATHS:
+        return
+    window_seconds = _settings.rate_limit_window
+    window = int(time.time()) // window_seconds
+    client_ip = _client_ip(request)
+    
+    if _rate_limit_incr is not None:
+        try:
+            count = await _rate_limit_incr(keys=[f"rl:{client_ip}:{window}"], args=[window_seconds])
+        except Exception as e:
+            # Fail open - an unavailable Redis must not take the API down with it
+            logger.debug(f"Rate limit check skipped: {e}")
+            return
+    else:
+        if window != _local_rate_window:
+            _local_rate_window = window
+            _local_rate_counts = {}
+        count = _local_rate_counts.get(client_ip, 0) + 1
+        _local_rate_counts[client_ip] = count
+    
+    if count > _settings.rate_limit_requests:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(window_seconds - int(time.time()) % window_seconds)}
+        )
 
 app = FastAPI(
     title=_settings.app_name,
@@ -638,7 +961,8 @@ app = FastAPI(
     version=_settings.app_version,
     docs_url="/api/docs" if DEBUG else None,
     redoc_url="/api/redoc" if DEBUG else None,
-    lifespan=lifespan
+    lifespan=lifespan,
+    dependencies=[Depends(rate_limit_check)]
 )
 
 # Include advanced AI services router
@@ -659,24 +983,6 @@ app.add_middleware(
 )
 logger.info(f"✅ CORS enabled for: {', '.join(allowed_origins)}")
 
-# Performance: Rate limiting and request tracking
-from collections import defaultdict
-from datetime import datetime as dt
-
-request_counts = defaultdict(int)
-last_reset = dt.now()
-
-async def rate_limit_check():
-    """Simple in-memory rate limiting"""
-    global last_reset, request_counts
-    now = dt.now()
-    if (now - last_reset).seconds > 60:
-        request_counts.clear()
-        last_reset = now
-    
-    # Allow up to 1000 requests per minute per IP (adjust as needed)
-    # For production, use Redis or proper rate limiting middleware
-
 @app.middleware("http")
 async def add_performance_headers(request, call_next):
     """Add performance monitoring headers"""
@@ -731,6 +1037,7 @@ async def root():
     }
 
 @app.get("/health")
+@cached_response(ttl=5)  # psutil sampling blocks for 100ms; absorb probe bursts
 async def health_check():
     """Health check endpoint for monitoring"""
     try:
@@ -750,6 +1057,8 @@ async def health_check():
         "system": system_info,
         "cache": {
             "response_cache_size": len(response_cache),
+            "response_cache_hits": response_cache_stats['hits'],
+            "response_cache_misses": response_cache_stats['misses'],
             "ai_embedding_cache": len(ai_service.embedding_cache) if hasattr(ai_service, 'embedding_cache') else 0
         }
     }
@@ -780,6 +1089,7 @@ async def verify_setup():
 
 
 @app.get("/api/setup/status")
+@cached_response(ttl=300)  # Environment-derived, only changes on restart
 async def get_setup_status():
     """
     Get quick setup status summary
@@ -1047,11 +1357,11 @@ async def trigger_manual_scrape(process_all: bool = True):
                         candidates.append(candidate)
                         
                         # Save to database
-                        existing = await asyncio.to_thread(db_service.get_candidate_by_email, candidate['email'])
+                        existing = await db_service.get_candidate_by_email_async(candidate['email'])
                         if existing:
-                            await asyncio.to_thread(db_service.update_candidate, candidate)
+                            await db_service.update_candidate_async(candidate)
                         else:
-                            await asyncio.to_thread(db_service.insert_candidate, candidate)
+                            await db_service.insert_candidate_async(candidate)
                 
                 mail.logout()
                 
@@ -1159,7 +1469,7 @@ async def reset_and_reparse_all_emails():
                 received_dt = msg.get('receivedDateTime')
                 if received_dt:
                     try:
-                        received_date = datetime.fromisoformat(received_dt.replace('Z', '+00:00'))
+                        received_date = _parse_graph_datetime(received_dt)
                     except Exception:
                         received_date = datetime.now()
                 else:
@@ -1265,9 +1575,9 @@ async def get_candidates(
     cache_key = f"candidates_p{page}_l{limit}_c{job_category}_s{min_score}"
     
     # Check cache first
-    if cache_key in response_cache:
+    cached_result = cache_get(cache_key)
+    if cached_result is not None:
         logger.info("⚡ Cache hit for candidates")
-        cached_result = response_cache[cache_key]
         cached_result["from_cache"] = True
         return cached_result
     
@@ -1278,14 +1588,12 @@ async def get_candidates(
         if min_score:
             filters['min_score'] = min_score
         
-        # Use connection pooling
-        async with db_semaphore:
-            candidates = await asyncio.to_thread(
-                db_service.get_candidates_paginated,
-                page,
-                limit,
-                filters
-            )
+        candidates = await asyncio.to_thread(
+            db_service.get_candidates_paginated,
+            page,
+            limit,
+            filters
+        )
         
         result = {
             "page": page,
@@ -1296,7 +1604,7 @@ async def get_candidates(
         }
         
         # Cache result
-        response_cache[cache_key] = result
+        cache_set(cache_key, result)
         
         return result
     except Exception as e:
@@ -1772,8 +2080,8 @@ async def get_candidate_deep_analysis(candidate_id: str):
         
         # Check cache first
         cache_key = f"deep_analysis_{candidate_id}"
-        if cache_key in response_cache:
-            cached = response_cache[cache_key]
+        cached = cache_get(cache_key)
+        if cached is not None:
             cached['from_cache'] = True
             return cached
         
@@ -1791,7 +2099,7 @@ async def get_candidate_deep_analysis(candidate_id: str):
                         "ai_powered": True,
                         "source": "local_llm"
                     }
-                    response_cache[cache_key] = result
+                    cache_set(cache_key, result)
                     return result
         except Exception as llm_err:
             logger.warning(f"LLM deep analysis failed: {llm_err}")
@@ -1809,7 +2117,7 @@ async def get_candidate_deep_analysis(candidate_id: str):
                 "ai_powered": True,
                 "source": "openai_fallback"
             }
-            response_cache[cache_key] = result
+            cache_set(cache_key, result)
             return result
         
         # TIER 3: Basic fallback — No AI
@@ -2763,14 +3071,13 @@ async def sync_email_applications(request: EmailSyncRequest):
                 except Exception as ai_error:
                     logger.warning(f"AI processing failed for {candidate_data['name']}: {str(ai_error)}")
                 
-                # Save to database with semaphore (prevent DB lock)
-                async with db_semaphore:
-                    existing = await asyncio.to_thread(db_service.get_candidate_by_email, candidate_data['email'])
-                    if existing:
-                        await asyncio.to_thread(db_service.update_candidate, candidate_data)
-                    else:
-                        await asyncio.to_thread(db_service.insert_candidate, candidate_data)
-                        saved_count += 1
+                # Save to database (concurrency is bounded by the async pool)
+                existing = await db_service.get_candidate_by_email_async(candidate_data['email'])
+                if existing:
+                    await db_service.update_candidate_async(candidate_data)
+                else:
+                    await db_service.insert_candidate_async(candidate_data)
+                    saved_count += 1
                 
                 return True
             except Exception as e:
@@ -2943,7 +3250,7 @@ async def trigger_reset_and_reparse(email_address: str):
                 received_dt = msg.get('receivedDateTime')
                 if received_dt:
                     try:
-                        received_date = datetime.fromisoformat(received_dt.replace('Z', '+00:00'))
+                        received_date = _parse_graph_datetime(received_dt)
                     except Exception:
                         received_date = datetime.now()
                 else:
@@ -3213,7 +3520,7 @@ async def get_sync_status():
     """
     try:
         candidate_count = await asyncio.to_thread(lambda: db_service.get_total_candidates())
-        sync_interval = int(os.getenv('SYNC_INTERVAL_MINUTES', '2'))
+        sync_interval = _settings.sync_interval_minutes
         return {
             'last_sync_time': _last_email_sync_time,
             'candidate_count': candidate_count,
@@ -3224,7 +3531,7 @@ async def get_sync_status():
         return {
             'last_sync_time': _last_email_sync_time,
             'candidate_count': 0,
-            'sync_interval_minutes': int(os.getenv('SYNC_INTERVAL_MINUTES', '2')),
+            'sync_interval_minutes': _settings.sync_interval_minutes,
             'status': 'error',
             'error': str(e)
         }
@@ -3260,7 +3567,7 @@ async def process_single_email(message_id: str, graph_service):
         received_dt = msg.get('receivedDateTime')
         if received_dt:
             try:
-                received_date = datetime.fromisoformat(received_dt.replace('Z', '+00:00'))
+                received_date = _parse_graph_datetime(received_dt)
             except Exception:
                 received_date = datetime.now()
         else:
@@ -4783,4 +5090,7 @@ async def ai_smart_search(
         raise HTTPException(500, str(e))
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    if "--sync-worker" in sys.argv:
+        asyncio.run(run_sync_worker())
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -12,14 +12,100 @@ import logging
 from contextlib import contextmanager
 from threading import Lock
 
+from core.database import AsyncConnectionPool
+
 logger = logging.getLogger(__name__)
 
+# Column order of _insert_params(); the INSERT statements below are generated
+# from it once at import time so the column and placeholder lists cannot drift
+_CANDIDATE_INSERT_COLUMNS = (
+    'id', 'email', 'email_hash', 'name', 'phone', 'location',
+    'skills', 'experience', 'education', 'summary', 'work_history',
+    'linkedin', 'status', 'match_score', 'job_category', 'job_subcategory',
+    'applied_date', 'last_updated', 'raw_email_subject',
+    'certifications', 'languages', 'resume_text',
+)
+
+
+def _insert_sql(verb: str, columns: tuple) -> str:
+    """Build a one-row INSERT statement for the given columns"""
+    return f"{verb} INTO candidates ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+_INSERT_CANDIDATE_SQL = _insert_sql("INSERT OR REPLACE", _CANDIDATE_INSERT_COLUMNS)
+
+_UPDATE_CANDIDATE_SQL = """
+    UPDATE candidates SET
+        name = ?,
+        phone = ?,
+        location = ?,
+        skills = ?,
+        experience = ?,
+        education = ?,
+        summary = ?,
+        work_history = ?,
+        linkedin = ?,
+        status = ?,
+        match_score = ?,
+        job_category = ?,
+        job_subcategory = ?,
+        last_updated = ?,
+        raw_email_subject = ?,
+        certifications = ?,
+        languages = ?,
+        resume_text = COALESCE(?, resume_text)
+    WHERE id = ?
+"""
+
+# Single round-trip insert-or-refresh keyed on the normalized email. On conflict
+# only the per-email fields are refreshed so an existing AI profile survives;
+# created_at is bound per call and left untouched by DO UPDATE, so reading it
+# back tells the caller whether this statement inserted the row.
+_UPSERT_CANDIDATE_SQL = _insert_sql("INSERT", _CANDIDATE_INSERT_COLUMNS + ('created_at',)) + """
+    ON CONFLICT(email_hash) DO UPDATE SET
+        name = excluded.name,
+        last_updated = excluded.last_updated,
+        raw_email_subject = excluded.raw_email_subject,
+        resume_text = COALESCE(NULLIF(excluded.resume_text, ''), resume_text),
+        is_active = 1
+    RETURNING id, created_at, ai_analysis IS NOT NULL, match_score, job_category
+"""
+
+_UPDATE_AI_FIELDS_SQL = """
+    UPDATE candidates SET
+        phone = ?,
+        location = ?,
+        skills = ?,
+        experience = ?,
+        education = ?,
+        summary = ?,
+        linkedin = ?,
+        status = ?,
+        match_score = ?,
+        job_category = ?,
+        certifications = ?,
+        languages = ?,
+        last_updated = ?,
+        ai_analysis = COALESCE(?, ai_analysis)
+    WHERE id = ?
+"""
+
+
+def _education_json(candidate: Dict) -> str:
+    """Handle education - ensure it's JSON string"""
+    education_data = candidate.get('education', '[]')
+    if isinstance(education_data, list):
+        return json.dumps(education_data)
+    return education_data or '[]'
+
 class DatabaseService:
     def __init__(self, db_path: str = "./recruitment.db"):
         self.db_path = db_path
         self.connection_lock = Lock()
         self._connection_pool = []
         self._pool_size = 10
+        # aiosqlite pool for the async hot paths (email sync); opened in init_async_pool()
+        self._async_pool: Optional[AsyncConnectionPool] = None
         self.init_database()
         logger.info(f"✅ Database initialized with connection pool (size: {self._pool_size})")
     
@@ -319,34 +405,22 @@ class DatabaseService:
         """Insert new candidate (or update if exists)"""
         conn = self.get_connection_raw()
         cursor = conn.cursor()
-        
-        email_hash = self.email_to_hash(candidate['email'])
-        
-        # Handle education - ensure it's JSON string
-        education_data = candidate.get('education', '[]')
-        if isinstance(education_data, list):
-            education_data = json.dumps(education_data)
-        elif not education_data:
-            education_data = '[]'
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO candidates (
-                id, email, email_hash, name, phone, location, 
-                skills, experience, education, summary, work_history,
-                linkedin, status, match_score, job_category, job_subcategory,
-                applied_date, last_updated, raw_email_subject,
-                certifications, languages, resume_text
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        cursor.execute(_INSERT_CANDIDATE_SQL, self._insert_params(candidate))
+        conn.commit()
+        conn.close()
+    
+    def _insert_params(self, candidate: Dict) -> tuple:
+        """Bind parameters for _INSERT_CANDIDATE_SQL"""
+        return (
             candidate['id'],
             candidate['email'],
-            email_hash,
+            self.email_to_hash(candidate['email']),
             candidate['name'],
             candidate.get('phone', ''),
             candidate.get('location', ''),
             json.dumps(candidate.get('skills', [])),
             candidate.get('experience', 0),
-            education_data,
+            _education_json(candidate),
             candidate.get('summary', ''),
             json.dumps(candidate.get('workHistory', [])),
             candidate.get('linkedin', ''),
@@ -360,10 +434,7 @@ class DatabaseService:
             json.dumps(candidate.get('certifications', [])),
             json.dumps(candidate.get('languages', [])),
             candidate.get('resume_text', ''),
-        ))
-        
-        conn.commit()
-        conn.close()
+        )
     
     def save_ai_analysis(self, candidate_id: str, analysis: Dict):
         """Save detailed AI analysis for a candidate"""
@@ -394,42 +465,19 @@ class DatabaseService:
         """Update existing candidate (merge new data)"""
         conn = self.get_connection_raw()
         cursor = conn.cursor()
-        
-        # Handle education - ensure it's JSON string
-        education_data = candidate.get('education', '[]')
-        if isinstance(education_data, list):
-            education_data = json.dumps(education_data)
-        elif not education_data:
-            education_data = '[]'
-        
-        cursor.execute("""
-            UPDATE candidates SET
-                name = ?,
-                phone = ?,
-                location = ?,
-                skills = ?,
-                experience = ?,
-                education = ?,
-                summary = ?,
-                work_history = ?,
-                linkedin = ?,
-                status = ?,
-                match_score = ?,
-                job_category = ?,
-                job_subcategory = ?,
-                last_updated = ?,
-                raw_email_subject = ?,
-                certifications = ?,
-                languages = ?,
-                resume_text = COALESCE(?, resume_text)
-            WHERE id = ?
-        """, (
+        cursor.execute(_UPDATE_CANDIDATE_SQL, self._update_params(candidate))
+        conn.commit()
+        conn.close()
+    
+    def _update_params(self, candidate: Dict) -> tuple:
+        """Bind parameters for _UPDATE_CANDIDATE_SQL"""
+        return (
             candidate['name'],
             candidate.get('phone', ''),
             candidate.get('location', ''),
             json.dumps(candidate.get('skills', [])),
             candidate.get('experience', 0),
-            education_data,
+            _education_json(candidate),
             candidate.get('summary', ''),
             json.dumps(candidate.get('workHistory', [])),
             candidate.get('linkedin', ''),
@@ -443,10 +491,117 @@ class DatabaseService:
             json.dumps(candidate.get('languages', [])),
             candidate.get('resume_text', None),
             candidate['id']
-        ))
+        )
+    
+    # ------------------------------------------------------------------
+    # Async variants for the email sync hot path. These run on a pooled
+    # aiosqlite connection instead of dispatching to the thread pool and
+    # opening a fresh sqlite3 connection per call.
+    # ------------------------------------------------------------------
+    
+    async def init_async_pool(self, max_connections: int = 10):
+        """
+        Open the aiosqlite connection pool (idempotent)
+        max_connections is the single bound on concurrent async DB operations
+        """
+        if self._async_pool is None:
+            self._async_pool = AsyncConnectionPool(self.db_path, max_connections=max_connections)
+        await self._async_pool.initialize()
+    
+    async def close_async_pool(self):
+        """Close the aiosqlite connection pool"""
+        if self._async_pool is not None:
+            await self._async_pool.close()
+            self._async_pool = None
+    
+    def _async_connection(self):
+        """Acquire a pooled aiosqlite connection, opening the pool on first use"""
+        if self._async_pool is None:
+            self._async_pool = AsyncConnectionPool(self.db_path)
+        return self._async_pool.acquire()
+    
+    async def get_candidate_by_email_async(self, email: str) -> Optional[Dict]:
+        """Async version of get_candidate_by_email()"""
+        email_hash = self.email_to_hash(email)
+        async with self._async_connection() as conn:
+            cursor = await conn.execute("""
+                SELECT * FROM candidates 
+                WHERE email_hash = ? AND is_active = 1
+            """, (email_hash,))
+            row = await cursor.fetchone()
+            if not row:
+                return None
+            
+            cursor = await conn.execute("SELECT 1 FROM resumes WHERE candidate_id = ?", (row[0],))
+            has_resume = await cursor.fetchone() is not None
         
-        conn.commit()
-        conn.close()
+        candidate = self._row_to_candidate(row, check_resume=False)
+        candidate['hasResume'] = has_resume
+        return candidate
+    
+    async def get_total_candidates_async(self) -> int:
+        """Async version of get_total_candidates()"""
+        async with self._async_connection() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM candidates WHERE is_active = 1")
+            row = await cursor.fetchone()
+        return row[0]
+    
+    async def insert_candidate_async(self, candidate: Dict):
+        """Async version of insert_candidate()"""
+        async with self._async_connection() as conn:
+            await conn.execute(_INSERT_CANDIDATE_SQL, self._insert_params(candidate))
+    
+    async def update_candidate_async(self, candidate: Dict):
+        """Async version of update_candidate()"""
+        async with self._async_connection() as conn:
+            await conn.execute(_UPDATE_CANDIDATE_SQL, self._update_params(candidate))
+    
+    async def save_ai_analysis_async(self, candidate_id: str, analysis: Dict):
+        """Async version of save_ai_analysis()"""
+        async with self._async_connection() as conn:
+            await conn.execute(
+                "UPDATE candidates SET ai_analysis = ? WHERE id = ?",
+                (json.dumps(analysis, default=str), candidate_id)
+            )
+    
+    async def upsert_candidate_async(self, candidate: Dict) -> Dict:
+        """
+        Insert a candidate or refresh its per-email fields in one statement
+        Returns {'id', 'is_new', 'has_ai_analysis', 'matchScore', 'job_category'} for the stored row
+        """
+        marker = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+        async with self._async_connection() as conn:
+            cursor = await conn.execute(_UPSERT_CANDIDATE_SQL, self._insert_params(candidate) + (marker,))
+            row = await cursor.fetchone()
+        
+        return {
+            'id': row[0],
+            'is_new': row[1] == marker,
+            'has_ai_analysis': bool(row[2]),
+            'matchScore': row[3] or 50,  # Same default as _row_to_candidate
+            'job_category': row[4] or 'General',
+        }
+    
+    async def update_ai_fields_async(self, candidate: Dict, analysis: Optional[Dict] = None):
+        """Write the AI-derived profile fields (and optionally the analysis JSON) for a candidate"""
+        async with self._async_connection() as conn:
+            await conn.execute(_UPDATE_AI_FIELDS_SQL, (
+                candidate.get('phone', ''),
+                candidate.get('location', ''),
+                json.dumps(candidate.get('skills', [])),
+                candidate.get('experience', 0),
+                _education_json(candidate),
+                candidate.get('summary', ''),
+                candidate.get('linkedin', ''),
+                candidate.get('status', 'New'),
+                candidate.get('matchScore', 50),
+                candidate.get('job_category', 'General'),
+                json.dumps(candidate.get('certifications', [])),
+                json.dumps(candidate.get('languages', [])),
+                candidate.get('last_updated'),
+                json.dumps(analysis, default=str) if analysis is not None else None,
+                candidate['id'],
+            ))
     
     def get_candidates_paginated(self, page: int = 1, limit: int = 50, filters: Dict = None):
         """Get candidates with pagination, ranked by AI score within job categories"""
@@ -1,5 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
 from datetime import datetime, timedelta
 from urllib.parse import quote
 import base64
@@ -8,6 +10,29 @@ import asyncio
 
 logger = logging.getLogger(__name__)
 
+# One HTTP session per process, shared by every MicrosoftGraphService. Instances are
+# created per request and carry their own token, so they own no sockets themselves.
+_http_session: Optional[requests.Session] = None
+
+def get_http_session() -> requests.Session:
+    """Process-wide session: keep-alive connections (and TLS sessions) are reused across calls"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        # Pool sized for the concurrent to_thread requests issued during email sync
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=20))
+        # Every call authenticates with its own header; never carry cookies between accounts
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        _http_session = session
+    return _http_session
+
+def close_http_session() -> None:
+    """Close the shared session's pooled connections (on shutdown)"""
+    global _http_session
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
+
 class MicrosoftGraphService:
     """
     Microsoft Graph API integration for Outlook/Office 365
@@ -15,6 +40,9 @@ class MicrosoftGraphService:
     Supports both delegated permissions (user flow) and application permissions (service principal)
     """
     
+    # Graph rejects JSON batches with more than 20 sub-requests
+    BATCH_MAX_REQUESTS = 20
+    
     def __init__(self, client_id: str, client_secret: str, tenant_id: str, user_email: str = None):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -24,6 +52,7 @@ class MicrosoftGraphService:
         self.access_token = None
         self.token_expiry = None
         self.auth_type = None  # 'delegated' or 'application'
+        self.session = get_http_session()
     
     async def authenticate(self, authorization_code: str, redirect_uri: str) -> Dict[str, Any]:
         """
@@ -41,7 +70,7 @@ class MicrosoftGraphService:
         }
         
         try:
-            response = await asyncio.to_thread(lambda: requests.post(token_url, data=data, timeout=15))
+            response = await asyncio.to_thread(lambda: self.session.post(token_url, data=data, timeout=15))
             response.raise_for_status()
             
             token_data = response.json()
@@ -84,7 +113,7 @@ class MicrosoftGraphService:
         }
         
         try:
-            response = await asyncio.to_thread(lambda: requests.post(token_url, data=data, timeout=15))
+            response = await asyncio.to_thread(lambda: self.session.post(token_url, data=data, timeout=15))
             response.raise_for_status()
             
             token_data = response.json()
@@ -152,7 +181,7 @@ class MicrosoftGraphService:
             while url:
                 page_count += 1
                 response = await asyncio.to_thread(
-                    lambda u=url, p=params: requests.get(u, headers=headers, params=p, timeout=30)
+                    lambda u=url, p=params: self.session.get(u, headers=headers, params=p, timeout=30)
                 )
                 response.raise_for_status()
                 
@@ -192,6 +221,62 @@ class MicrosoftGraphService:
                 'message': str(e)
             }
     
+    async def iter_messages(
+        self,
+        folder: str = 'inbox',
+        filter_query: Optional[str] = None,
+        page_size: int = 100,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield messages from the specified folder one page at a time by following @odata.nextLink
+        Only the current page is held in memory and the next page is requested when the
+        caller asks for it, so processing can start on page 1 before the rest is fetched.
+        Unlike get_messages, HTTP errors are raised rather than returned as a status dict.
+        """
+        if not self._is_token_valid():
+            raise RuntimeError('Token expired or invalid')
+        
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+        
+        if self.auth_type == 'application' and self.user_email:
+            url = f"{self.graph_url}/users/{self.user_email}/mailFolders/{folder}/messages"
+        else:
+            url = f"{self.graph_url}/me/mailFolders/{folder}/messages"
+        
+        params = {'$top': page_size, '$orderby': 'receivedDateTime desc'}
+        if filter_query:
+            params['$filter'] = filter_query
+        
+        remaining = limit
+        page_count = 0
+        while url:
+            page_count += 1
+            response = await asyncio.to_thread(
+                lambda u=url, p=params: self.session.get(u, headers=headers, params=p, timeout=30)
+            )
+            response.raise_for_status()
+            
+            data = response.json()
+            messages = data.get('value', [])
+            if remaining is not None:
+                messages = messages[:remaining]
+                remaining -= len(messages)
+            
+            logger.info(f"📧 Fetched page {page_count}: {len(messages)} emails")
+            if messages:
+                yield messages
+            
+            if remaining is not None and remaining <= 0:
+                break
+            
+            # nextLink already contains all parameters
+            url = data.get('@odata.nextLink')
+            params = {}
+    
     async def get_message_with_attachments(self, message_id: str) -> Dict[str, Any]:
         """
         Get full message with attachments
@@ -212,34 +297,20 @@ class MicrosoftGraphService:
                 base_url = f"{self.graph_url}/me/messages/{message_id}"
             
             # Get message
-            message_response = await asyncio.to_thread(lambda: requests.get(base_url, headers=headers, timeout=30))
+            message_response = await asyncio.to_thread(lambda: self.session.get(base_url, headers=headers, timeout=30))
             message_response.raise_for_status()
             message_data = message_response.json()
             
             # Get attachments
             attachments_url = f"{base_url}/attachments"
-            attachments_response = await asyncio.to_thread(lambda: requests.get(attachments_url, headers=headers, timeout=30))
+            attachments_response = await asyncio.to_thread(lambda: self.session.get(attachments_url, headers=headers, timeout=30))
             attachments_response.raise_for_status()
             attachments_data = attachments_response.json()
             
-            # Process attachments - extract file data
-            processed_attachments = []
-            for att in attachments_data.get('value', []):
-                if att.get('@odata.type') == '#microsoft.graph.fileAttachment':
-                    # Decode base64 content
-                    import base64
-                    file_content = base64.b64decode(att.get('contentBytes', ''))
-                    processed_attachments.append({
-                        'filename': att.get('name', 'unknown'),
-                        'data': file_content,
-                        'content_type': att.get('contentType', 'application/octet-stream'),
-                        'size': att.get('size', 0)
-                    })
-            
             return {
                 'status': 'success',
                 'message': message_data,
-                'attachments': processed_attachments
+                'attachments': self._process_attachments(attachments_data.get('value', []))
             }
         
         except Exception as e:
@@ -248,6 +319,76 @@ class MicrosoftGraphService:
                 'message': str(e)
             }
     
+    async def batch_get_attachments(self, message_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch attachments for many messages through the JSON $batch endpoint
+        Graph accepts at most 20 sub-requests per batch, so ids are sent in chunks of 20.
+        Returns {message_id: attachments}; messages whose sub-request failed are left out
+        so callers can fall back to get_message_with_attachments for them.
+        """
+        if not message_ids or not self._is_token_valid():
+            return {}
+        
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+        
+        # $batch URLs are relative to the service root
+        if self.auth_type == 'application' and self.user_email:
+            base_path = f"/users/{self.user_email}/messages"
+        else:
+            base_path = "/me/messages"
+        batch_url = f"{self.graph_url}/$batch"
+        
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for start in range(0, len(message_ids), self.BATCH_MAX_REQUESTS):
+            chunk = message_ids[start:start + self.BATCH_MAX_REQUESTS]
+            payload = {
+                'requests': [
+                    {'id': str(i), 'method': 'GET', 'url': f"{base_path}/{mid}/attachments"}
+                    for i, mid in enumerate(chunk)
+                ]
+            }
+            
+            try:
+                response = await asyncio.to_thread(
+                    lambda p=payload: self.session.post(batch_url, headers=headers, json=p, timeout=60)
+                )
+                response.raise_for_status()
+                batch_data = response.json()
+            except Exception as e:
+                logger.warning(f"Graph $batch attachment fetch failed: {str(e)[:100]}")
+                continue
+            
+            # Responses may come back in any order - demultiplex by sub-request id
+            for sub in batch_data.get('responses', []):
+                if sub.get('status') != 200:
+                    continue
+                try:
+                    mid = chunk[int(sub['id'])]
+                except (KeyError, ValueError, IndexError):
+                    continue
+                results[mid] = self._process_attachments(sub.get('body', {}).get('value', []))
+        
+        return results
+    
+    @staticmethod
+    def _process_attachments(values: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Decode file attachments from a Graph attachments listing"""
+        processed_attachments = []
+        for att in values:
+            if att.get('@odata.type') == '#microsoft.graph.fileAttachment':
+                # Decode base64 content
+                file_content = base64.b64decode(att.get('contentBytes', ''))
+                processed_attachments.append({
+                    'filename': att.get('name', 'unknown'),
+                    'data': file_content,
+                    'content_type': att.get('contentType', 'application/octet-stream'),
+                    'size': att.get('size', 0)
+                })
+        return processed_attachments
+    
     async def search_application_emails(self, keywords: list = None) -> Dict[str, Any]:
         """
         Search for job application emails
@@ -291,7 +432,7 @@ class MicrosoftGraphService:
         
         try:
             url = f"{self.graph_url}/me/messages/{message_id}/attachments/{attachment_id}"
-            response = await asyncio.to_thread(lambda: requests.get(url, headers=headers, timeout=30))
+            response = await asyncio.to_thread(lambda: self.session.get(url, headers=headers, timeout=30))
             response.raise_for_status()
             
             attachment_data = response.json()
@@ -326,7 +467,7 @@ class MicrosoftGraphService:
         
         try:
             url = f"{self.graph_url}/me/mailFolders/{parent_folder}/childFolders"
-            response = await asyncio.to_thread(lambda: requests.post(url, headers=headers, json=data, timeout=15))
+            response = await asyncio.to_thread(lambda: self.session.post(url, headers=headers, json=data, timeout=15))
             response.raise_for_status()
             
             folder_data = response.json()
@@ -359,7 +500,7 @@ class MicrosoftGraphService:
         
         try:
             url = f"{self.graph_url}/me/messages/{message_id}/move"
-            response = await asyncio.to_thread(lambda: requests.post(url, headers=headers, json=data, timeout=15))
+            response = await asyncio.to_thread(lambda: self.session.post(url, headers=headers, json=data, timeout=15))
             response.raise_for_status()
             
             return {'status': 'success', 'message': 'Message moved successfully'}
@@ -405,7 +546,7 @@ class MicrosoftGraphService:
             else:
                 url = f"{self.graph_url}/me/sendMail"
 
-            response = await asyncio.to_thread(lambda: requests.post(url, headers=headers, json=email_payload, timeout=30))
+            response = await asyncio.to_thread(lambda: self.session.post(url, headers=headers, json=email_payload, timeout=30))
             response.raise_for_status()
 
             logger.info(f"✅ Email sent to {to_email}: {subject}")
@@ -444,7 +585,7 @@ class MicrosoftGraphService:
         }
         
         try:
-            response = await asyncio.to_thread(lambda: requests.post(token_url, data=data, timeout=15))
+            response = await asyncio.to_thread(lambda: self.session.post(token_url, data=data, timeout=15))
             response.raise_for_status()
             
             token_data = response.json()
@@ -11,6 +11,8 @@ from enum import Enum
 import json
 import os
 
+from core.config import get_settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,8 +70,10 @@ class OAuthAutomationService:
         self._last_sync_time: Optional[datetime] = None
         self._last_sync_result: Optional[Dict] = None
         self._next_sync_time: Optional[datetime] = None
-        self._sync_interval_minutes = int(os.getenv('SYNC_INTERVAL_MINUTES', '15'))
-        self._token_refresh_margin_minutes = 10  # Refresh 10 minutes before expiry
+        self._sync_interval_minutes = get_settings().sync_interval_minutes
+        self._token_refresh_fraction = 0.8  # Refresh in the background at 80% of token lifetime
+        self._token_refresh_margin_minutes = 10  # Fallback when the issue time is unknown
+        self._refresh_lock = asyncio.Lock()  # One refresh in flight; concurrent callers share it
         
         # Retry configuration
         self._max_retries = 3
@@ -79,6 +83,7 @@ class OAuthAutomationService:
         # Background tasks
         self._sync_task: Optional[asyncio.Task] = None
         self._token_monitor_task: Optional[asyncio.Task] = None
+        self._background_refresh_task: Optional[asyncio.Task] = None
         self._running = False
         
         # Event callbacks
@@ -159,6 +164,15 @@ class OAuthAutomationService:
             logger.info(f"🔐 Auth status: {old_status.value} → {status.value}")
             self._emit_event('auth_status', {'old': old_status.value, 'new': status.value})
     
+    def _stale_at(self, token_data: Dict) -> datetime:
+        """Time after which a still-valid token should be refreshed in the background"""
+        expires_at = token_data['expires_at_dt']
+        try:
+            lifetime = expires_at - datetime.fromisoformat(token_data['updated_at'])
+        except (KeyError, TypeError, ValueError):
+            return expires_at - timedelta(minutes=self._token_refresh_margin_minutes)
+        return expires_at - lifetime * (1 - self._token_refresh_fraction)
+    
     def _set_sync_status(self, status: SyncStatus):
         """Update sync status and emit event"""
         if self._sync_status != status:
@@ -183,14 +197,11 @@ class OAuthAutomationService:
             
             if not is_expired:
                 # Check if approaching expiry
-                expires_at = token_data.get('expires_at_dt')
-                if expires_at:
-                    time_to_expiry = (expires_at - datetime.now()).total_seconds() / 60
-                    if time_to_expiry < self._token_refresh_margin_minutes:
-                        # Token about to expire - refresh proactively
-                        if has_refresh:
-                            self._set_auth_status(AuthStatus.EXPIRED)
-                            return AuthStatus.EXPIRED
+                if datetime.now() >= self._stale_at(token_data):
+                    # Token about to expire - refresh proactively
+                    if has_refresh:
+                        self._set_auth_status(AuthStatus.EXPIRED)
+                        return AuthStatus.EXPIRED
                 
                 self._set_auth_status(AuthStatus.VALID)
                 return AuthStatus.VALID
@@ -210,27 +221,35 @@ class OAuthAutomationService:
     async def ensure_valid_token(self) -> Dict[str, Any]:
         """
         Ensure we have a valid access token
-        Automatically refreshes if expired
+        Fresh token: returned as is. Stale (past 80% of its lifetime): returned as is while a
+        refresh runs in the background. Expired or missing: waits for the refresh.
         Returns token data or error
         """
         if not self.is_configured:
             return {'status': 'error', 'message': 'OAuth2 not configured'}
         
-        status = await self.check_auth_status()
-        
-        if status == AuthStatus.VALID:
-            token_data = self._token_storage.get_token(self.primary_email)
+        token_data = self._token_storage.get_token(self.primary_email)
+        if token_data and not token_data.get('is_expired', True):
+            if datetime.now() >= self._stale_at(token_data):
+                self._start_background_refresh()
+            self._set_auth_status(AuthStatus.VALID)
             return {'status': 'success', 'token': token_data}
         
-        if status == AuthStatus.EXPIRED:
-            # Try to refresh the token
+        return await self._refresh_once()
+    
+    async def _refresh_once(self) -> Dict[str, Any]:
+        """Refresh unless another caller already did while we waited for the lock"""
+        async with self._refresh_lock:
+            token_data = self._token_storage.get_token(self.primary_email)
+            if (token_data and not token_data.get('is_expired', True)
+                    and datetime.now() < self._stale_at(token_data)):
+                return {'status': 'success', 'token': token_data}
             return await self.refresh_token()
-        
-        if status == AuthStatus.NO_TOKEN:
-            # Try client credentials as fallback
-            return await self.authenticate_with_credentials()
-        
-        return {'status': 'error', 'message': f'Auth status: {status.value}'}
+    
+    def _start_background_refresh(self):
+        """Fire-and-forget refresh of a stale token; at most one runs at a time"""
+        if self._background_refresh_task is None or self._background_refresh_task.done():
+            self._background_refresh_task = asyncio.create_task(self._refresh_once())
     
     async def refresh_token(self) -> Dict[str, Any]:
         """Refresh the OAuth2 access token"""
@@ -361,26 +380,53 @@ class OAuthAutomationService:
             except asyncio.CancelledError:
                 pass
         
+        if self._background_refresh_task and not self._background_refresh_task.done():
+            self._background_refresh_task.cancel()
+            try:
+                await self._background_refresh_task
+            except asyncio.CancelledError:
+                pass
+        
         logger.info("🛑 OAuth Automation Service stopped")
     
     async def _token_monitor_loop(self):
-        """Monitor token status and auto-refresh before expiry"""
+        """
+        Refresh the token once it passes 80% of its lifetime, so callers of
+        ensure_valid_token() never wait on the identity provider.
+        Failed refreshes back off exponentially (capped at 5 minutes); the remaining
+        20% of the lifetime absorbs short outages without the token ever expiring.
+        """
+        failures = 0
         while self._running:
             try:
-                status = await self.check_auth_status()
+                token_data = self._token_storage.get_token(self.primary_email) if self.is_configured else None
+                if not self.is_configured:
+                    delay = 300
+                elif token_data and not token_data.get('is_expired', True):
+                    delay = (self._stale_at(token_data) - datetime.now()).total_seconds()
+                else:
+                    delay = 0
                 
-                if status == AuthStatus.EXPIRED:
-                    logger.info("🔄 Token expiring soon, auto-refreshing...")
-                    await self.ensure_valid_token()
+                if delay > 0:
+                    # Re-read at least every 5 minutes - the token may be replaced by a manual login
+                    await asyncio.sleep(min(delay, 300))
+                    continue
                 
-                # Check every 5 minutes
-                await asyncio.sleep(300)
+                logger.info("🔄 Token expiring soon, auto-refreshing...")
+                result = await self._refresh_once()
+                if result.get('status') == 'success':
+                    failures = 0
+                    await asyncio.sleep(30)  # Never spin if the new token is short-lived
+                else:
+                    failures += 1
+                    await asyncio.sleep(min(self._retry_delay_base * 2 ** (failures - 1), 300))
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Token monitor error: {e}")
-                await asyncio.sleep(60)
+                failures += 1
+                await asyncio.sleep(min(self._retry_delay_base * 2 ** (failures - 1), 300))
     
     async def _sync_scheduler_loop(self):
         """Scheduled email sync loop with retry logic"""
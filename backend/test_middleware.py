@@ -0,0 +1,91 @@
+"""Test response compression and metrics collection in the middleware stack"""
+import asyncio
+import time
+import types
+import zlib
+from core import middleware
+from core.middleware import CompressionMiddleware, MetricsCollector, RequestMetrics
+
+BODY = b'{"candidates": [' + b'{"name": "Jane Doe", "skills": ["python", "sql"]}, ' * 200 + b'{}]}'
+
+def _strict_isal_backend():
+    """zlib stand-in that rejects levels above 3, like isal.isal_zlib"""
+    def check(level):
+        if not 0 <= level <= 3:
+            raise ValueError(f"Compression level should be between 0 and 3, got {level}")
+    
+    def compress(data, level, wbits):
+        check(level)
+        return zlib.compress(data, level, wbits)
+    
+    def compressobj(level, method, wbits):
+        check(level)
+        return zlib.compressobj(level, method, wbits)
+    
+    return types.SimpleNamespace(
+        compress=compress, compressobj=compressobj, ISAL_BEST_COMPRESSION=3,
+        DEFLATED=zlib.DEFLATED, Z_FINISH=zlib.Z_FINISH, Z_SYNC_FLUSH=zlib.Z_SYNC_FLUSH
+    )
+
+def _gzip_backends():
+    backends = {'zlib': zlib, 'isal-like': _strict_isal_backend()}
+    try:
+        from isal import isal_zlib
+        backends['isal'] = isal_zlib
+    except ImportError:
+        pass
+    return backends
+
+def test_gzip_with_each_backend():
+    original = middleware._gzip_zlib
+    try:
+        for name, backend in _gzip_backends().items():
+            middleware._gzip_zlib = backend
+            mw = CompressionMiddleware(app=None)
+            expected_level = 6 if backend is zlib else 3
+            assert mw.gzip_level == expected_level, f"{name}: level {mw.gzip_level}"
+            
+            one_shot = mw._compress(BODY, "gzip")
+            assert zlib.decompress(one_shot, 31) == BODY, f"{name}: one-shot round trip"
+            
+            compress = mw._stream_compressor("gzip")
+            half = len(BODY) // 2
+            streamed = compress(BODY[:half], False) + compress(BODY[half:], True)
+            assert zlib.decompress(streamed, 31) == BODY, f"{name}: streamed round trip"
+    finally:
+        middleware._gzip_zlib = original
+
+def test_select_encoding_honours_q_values():
+    mw = CompressionMiddleware(app=None)
+    has_zstd = middleware.zstandard is not None
+    assert mw._select_encoding("gzip, deflate") == "gzip"
+    assert mw._select_encoding("zstd;q=0, gzip") == "gzip"
+    assert mw._select_encoding("gzip;q=0") is None
+    assert mw._select_encoding("identity") is None
+    assert mw._select_encoding("*;q=0.5") == ("zstd" if has_zstd else "gzip")
+    assert mw._select_encoding("zstd, gzip;q=0.5") == ("zstd" if has_zstd else "gzip")
+    assert mw._select_encoding("zstd;q=0.2, gzip;q=0.8") == "gzip"
+
+def test_metrics_close_drains_and_stops():
+    async def run():
+        collector = MetricsCollector(drain_interval=60)
+        for i in range(3):
+            collector.record_request_fast(RequestMetrics(
+                request_id=str(i), method="GET", path="/api/candidates", status_code=200,
+                response_time_ms=12.5, request_size=0, response_size=512,
+                timestamp=time.time(), client_ip="127.0.0.1", user_agent="test"
+            ))
+        drain_task = collector._drain_task
+        
+        await collector.close()
+        
+        assert drain_task.done(), "Drain task must be stopped"
+        assert collector._total_requests == 3, "Queued samples must be folded in on close"
+    
+    asyncio.run(run())
+
+if __name__ == '__main__':
+    test_gzip_with_each_backend()
+    test_select_encoding_honours_q_values()
+    test_metrics_close_drains_and_stops()
+    print("✅ Compression and metrics collection behave as expected")
@@ -0,0 +1,39 @@
+"""Test the background task manager"""
+import asyncio
+from core.tasks import BackgroundTaskManager, TaskStatus
+
+def test_cancel_while_queued():
+    async def run():
+        manager = BackgroundTaskManager(max_workers=1, batch_size=1)
+        ran = []
+        gate = asyncio.Event()
+        
+        async def blocker():
+            await gate.wait()
+        
+        async def job(name):
+            ran.append(name)
+        
+        await manager.start()
+        first = await manager.submit(blocker)
+        queued = await manager.submit(job, 'queued')
+        kept = await manager.submit(job, 'kept')
+        await asyncio.sleep(0.05)  # The single worker is now busy with blocker
+        
+        assert await manager.cancel_task(queued)
+        gate.set()
+        await manager.wait_for_task(kept, timeout=5)
+        await manager.stop()
+        
+        assert ran == ['kept'], "Cancelled task must not run"
+        assert (await manager.get_task(queued)).status is TaskStatus.CANCELLED
+        assert (await manager.get_task(first)).status is TaskStatus.COMPLETED
+        stats = manager.get_stats()
+        assert stats['completed_tasks'] == 2
+        assert stats['cancelled_tasks'] == 1
+    
+    asyncio.run(run())
+
+if __name__ == '__main__':
+    test_cancel_while_queued()
+    print("✅ Cancelled tasks are dropped from the queue")